@@ -17,6 +17,30 @@ def get_config_dir():
         except: pass
     return path
 
+def get_cache_dir(name):
+    """Get (and create) the OS-specific cache subdirectory called name"""
+    if platform.system() == "Windows":
+        base = os.environ.get("LOCALAPPDATA", os.path.expanduser("~"))
+        path = os.path.join(base, "cli-music-player", "cache", name)
+    else:
+        base = os.environ.get("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache"))
+        path = os.path.join(base, "cli-music-player", name)
+    if not os.path.exists(path):
+        try: os.makedirs(path)
+        except: pass
+    return path
+
+def write_json_atomic(path, data):
+    """Dump data to path; returns False instead of raising on failure"""
+    try:
+        # Write then rename so a concurrent reader never sees a partial file
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(path + '.tmp', path)
+        return True
+    except:
+        return False
+
 def get_config_path():
     return os.path.join(get_config_dir(), "config.json")
 
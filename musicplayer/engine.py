@@ -3,23 +3,26 @@ import os
 import threading
 import time
 import socket
-import json
 import tempfile
 import subprocess
 import random
-import urllib.request
-import urllib.parse
-import re
+import bisect
+import collections
 from PyQt6.QtCore import QObject, pyqtSignal
 
-from .utils import slugify, format_time, parse_lrc
+from .utils import read_local_lrc, stream_target, queue_keys, in_queue, format_time, is_audio_file, scan_audio_dir, walk_audio_files
 from .search import OnlineSearcher
 from .mpv_setup import get_mpv_path, download_mpv
 from .config import load_config, save_config
-from .ipc import MpvIpcClient
+from .ipc import MpvIpcClient, parse_message
+from .lyrics import query_providers, shutdown as shutdown_lyrics
+from .lyrics_cache import load_lyrics, save_lyrics
 
-# Supported audio extensions
-AUDIO_EXTENSIONS = {'.mp3', '.wav', '.flac', '.ogg', '.m4a', '.wma', '.aac', '.opus'}
+# Files between progress messages while a recursive scan runs
+SCAN_PROGRESS_EVERY = 500
+
+# mpv properties pushed to ipc_loop via observe_property
+OBSERVED_PROPERTIES = ("time-pos", "duration", "metadata", "pause", "idle-active")
 
 class PlayerEngine(QObject):
     # Signals for the GUI
@@ -42,20 +45,32 @@ class PlayerEngine(QObject):
         self.mpv_bin = get_mpv_path() or download_mpv()
         
         self.files = []
+        self._file_indices = []
         self.queue = []
         self.playing_index = -1
         self.paused = False
         self.volume = self.config.get('volume', 100)
         self.shuffle = False
-        self.playback_history = []
+        self.playback_history = collections.deque(maxlen=256)
         
         self.searcher = OnlineSearcher()
         self.mpv_process = None
+        self._mpv_started = threading.Event() # Wakes ipc_loop when mpv is spawned
+        # The running mpv with the generation and local path it was started for; ipc_loop
+        # drops its events once the generation moves on (under _event_lock)
+        self._mpv_gen = 0
+        self._mpv_owner = (None, 0, None)
+        self._event_lock = threading.RLock()
         self.ipc = MpvIpcClient()
         self.duration = 0
         self.position = 0
         self.metadata = {}
+        # Tags mpv reported per local file, so replays show them (and fetch lyrics) right away
+        self._meta_cache = {}
+        self._meta_path = None
         self.lyrics = None
+        self._lyrics_local = False # Lyrics came from a .lrc beside the track
+        self._lyrics_lock = threading.Lock()
         self.current_song_lyrics_fetched = False
         self.running = True
 
@@ -69,126 +84,116 @@ class PlayerEngine(QObject):
 
     def cleanup(self):
         self.running = False
+        self._mpv_started.set() # Let ipc_loop notice running is False
         if self.mpv_process:
             try:
-                self.ipc.send_command(["quit"])
-                try: self.mpv_process.wait(timeout=0.5)
-                except subprocess.TimeoutExpired: self.mpv_process.kill()
+                self.ipc.send_raw(MpvIpcClient.CMD_QUIT)
+                try: self.mpv_process.wait(timeout=0.3)
+                except subprocess.TimeoutExpired:
+                    self.mpv_process.terminate()
+                    try: self.mpv_process.wait(timeout=0.3)
+                    except subprocess.TimeoutExpired: self.mpv_process.kill()
             except:
                 try: self.mpv_process.kill()
                 except: pass
             self.mpv_process = None
             
         self.ipc.cleanup()
+        self.searcher.close()
+        shutdown_lyrics()
 
     def get_property(self, prop):
         res = self.ipc.send_command(["get_property", prop])
         if res:
             try:
-                data = json.loads(res.decode('utf-8').strip())
+                data = parse_message(res.strip())
                 return data.get("data")
             except: pass
         return None
 
     def ipc_loop(self):
         while self.running:
-            if self.mpv_process and self.mpv_process.poll() is None:
-                # ... (rest of loop remains same, using get_property which now uses ipc)
-                pos = self.get_property("time-pos")
-                if pos is not None: 
-                    self.position = float(pos)
-                
-                dur = self.get_property("duration")
-                if dur is not None: 
-                    self.duration = float(dur)
-                
-                if pos is not None and dur is not None:
-                    self.position_changed.emit(self.position, self.duration)
+            # Cleared before the check so a start in between is not missed
+            self._mpv_started.clear()
+            process, gen, meta_path = self._mpv_owner
+            if not (process and process is self.mpv_process and process.poll() is None):
+                self._mpv_started.wait() # Idle until the next mpv is spawned
+                continue
+            events = self.ipc.open_events(OBSERVED_PROPERTIES)
+            if events is None:
+                time.sleep(0.1)
+                continue
+            # Ends when this mpv instance quits; the outer loop then attaches to the next one
+            for event in events:
+                if not self.running or self.mpv_process is not process: break
+                with self._event_lock:
+                    # Another track was started; this mpv is on its way out
+                    if gen != self._mpv_gen: continue
+                    if event.get('event') == 'property-change':
+                        self.handle_property_change(event.get('name'), event.get('data'), meta_path)
+
+    def handle_property_change(self, name, value, meta_path=None):
+        if name == 'time-pos':
+            if value is not None:
+                self.position = float(value)
+                self.position_changed.emit(self.position, self.duration)
+        elif name == 'duration':
+            if value is not None:
+                self.duration = float(value)
+                self.position_changed.emit(self.position, self.duration)
+        elif name == 'metadata':
+            if value:
+                # Publish a fresh dict instead of mutating the one the GUI thread reads
+                current = self.metadata
+                new_title = value.get('title') or value.get('media-title') or current.get('title')
+                new_artist = value.get('artist') or current.get('artist')
                 
-                meta = self.get_property("metadata")
-                if meta:
-                    new_title = meta.get('title') or meta.get('media-title')
-                    new_artist = meta.get('artist')
-                    changed = False
-                    if new_title and self.metadata.get('title') != new_title:
-                        self.metadata['title'] = new_title
-                        changed = True
-                    if new_artist and self.metadata.get('artist') != new_artist:
-                        self.metadata['artist'] = new_artist
-                        changed = True
-                    
-                    if changed:
-                        self.log(f"Metadata changed: {self.metadata}")
-                        self.track_changed.emit(self.metadata)
-                        # Fetch lyrics if metadata changed
-                        if self.metadata.get('artist') and self.metadata.get('title'):
-                            threading.Thread(target=self.fetch_lyrics, 
-                                            args=(self.metadata['artist'], self.metadata['title']),
-                                            daemon=True).start()
-
-                paused = self.get_property("pause")
-                if paused is not None and self.paused != paused:
-                    self.paused = paused
-                    self.status_changed.emit(self.paused)
-                
-                idle = self.get_property("idle-active")
-                if idle is True: self.handle_end_of_file()
-            
-            time.sleep(0.5)
-
-    def fetch_from_letras_mus_br(self, artist, title):
-        try:
-            slug_artist = slugify(artist)
-            slug_title = slugify(title)
-            url = f"https://www.letras.mus.br/{slug_artist}/{slug_title}/"
-            req = urllib.request.Request(url, headers={'User-Agent': 'Mozilla/5.0'})
-            with urllib.request.urlopen(req, timeout=10) as response:
-                html = response.read().decode('utf-8', errors='ignore')
-                match = re.search(r'<div class="cnt-letra[^"]*"> (.*?)</div>', html, re.DOTALL)
-                if match:
-                    raw_html = match.group(1)
-                    text = re.sub(r'<br\s*/?>', '\n', raw_html)
-                    text = re.sub(r'<[^>]+>', '', text)
-                    text = text.replace('&lt;', '<').replace('&gt;', '>').replace('&amp;', '&').replace('&quot;', '"')
-                    lines = [line.strip() for line in text.split('\n')]
-                    return [{'time': None, 'text': line} for line in lines]
-        except: pass
-        return None
+                # Once per file, under the path its mpv was started with
+                if meta_path and meta_path not in self._meta_cache:
+                    self._meta_cache[meta_path] = {'title': new_title, 'artist': new_artist}
+                if new_title != current.get('title') or new_artist != current.get('artist'):
+                    snapshot = dict(current, title=new_title, artist=new_artist)
+                    self.metadata = snapshot
+                    self.log(f"Metadata changed: {snapshot}")
+                    self.track_changed.emit(snapshot)
+                    # Fetch lyrics if metadata changed
+                    if snapshot.get('artist') and snapshot.get('title'):
+                        threading.Thread(target=self.fetch_lyrics, 
+                                        args=(snapshot['artist'], snapshot['title']),
+                                        daemon=True).start()
+        elif name == 'pause':
+            if value is not None and self.paused != value:
+                self.paused = value
+                self.status_changed.emit(self.paused)
+        elif name == 'idle-active':
+            if value is True: self.handle_end_of_file()
 
     def fetch_lyrics(self, artist, title):
         self.log(f"Fetching lyrics for: {artist} - {title}")
-        # Prevent double fetching
-        if getattr(self, '_last_fetched_key', None) == (artist, title):
-            self.log("Skipping duplicate fetch")
+        if self._lyrics_local:
+            self.log("Using the track's .lrc file")
+            return
+        # Prevent double fetching: metadata events and play_file can both start one
+        with self._lyrics_lock:
+            if getattr(self, '_last_fetched_key', None) == (artist, title):
+                self.log("Skipping duplicate fetch")
+                return
+            self._last_fetched_key = (artist, title)
+
+        cached = load_lyrics(artist, title)
+        if cached is not None:
+            self.log("Lyrics cache hit")
+            self.lyrics = cached or [{'time': None, 'text': "Lyrics not found."}]
+            self.lyrics_loaded.emit(self.lyrics)
             return
-        self._last_fetched_key = (artist, title)
 
-        found_lyrics = False
-        try:
-            url = f"https://lrclib.net/api/get?artist_name={urllib.parse.quote(artist)}&track_name={urllib.parse.quote(title)}"
-            self.log(f"Requesting LRCLIB: {url}")
-            req = urllib.request.Request(url, headers={'User-Agent': 'CLI-Music-Player/1.0'})
-            with urllib.request.urlopen(req, timeout=10) as response:
-                data = json.loads(response.read().decode())
-                if data.get('syncedLyrics'):
-                    self.lyrics = parse_lrc(data['syncedLyrics'])
-                    found_lyrics = True
-                elif data.get('plainLyrics'):
-                    self.lyrics = [{'time': None, 'text': l} for l in data['plainLyrics'].split('\n')]
-                    found_lyrics = True
-        except Exception as e: 
-            self.log(f"LRCLIB Error: {e}")
-        
-        if not found_lyrics:
-             self.log("Falling back to letras.mus.br")
-             res = self.fetch_from_letras_mus_br(artist, title)
-             if res:
-                 self.lyrics = res
-                 found_lyrics = True
-
-        if not found_lyrics:
+        self.log(f"Requesting LRCLIB and letras.mus.br: {artist} - {title}")
+        res, lrclib_answered = query_providers(artist, title, log=self.log)
+        if res or lrclib_answered:
+            save_lyrics(artist, title, res or None)
+        if not res:
              self.log("Lyrics not found.")
-             self.lyrics = [{'time': None, 'text': "Lyrics not found."}]
+        self.lyrics = res or [{'time': None, 'text': "Lyrics not found."}]
         
         self.lyrics_loaded.emit(self.lyrics)
 
@@ -196,28 +201,26 @@ class PlayerEngine(QObject):
         if path: self.current_dir = path
         self.files = []
         try:
-            items = sorted(os.listdir(self.current_dir))
+            dirs, files = scan_audio_dir(self.current_dir)
+            base = os.path.abspath(self.current_dir)
             # Parent dir item
-            self.files.append({'name': '..', 'type': 'dir', 'path': '..'}) # Corrected escaping for '..' string
-            for item in items:
-                full_path = os.path.join(self.current_dir, item)
-                if os.path.isdir(full_path) and not item.startswith('.'):
-                    self.files.append({'name': item, 'type': 'dir', 'path': item})
-                elif os.path.isfile(full_path):
-                    if os.path.splitext(item)[1].lower() in AUDIO_EXTENSIONS:
-                        self.files.append({'name': item, 'type': 'file', 'path': item})
+            self.files.append({'name': '..', 'type': 'dir', 'path': '..', 'abs_path': os.path.dirname(base)})
+            self.files.extend({'name': d, 'type': 'dir', 'path': d, 'abs_path': os.path.join(base, d)} for d in dirs)
+            self.files.extend({'name': f, 'type': 'file', 'path': f, 'abs_path': os.path.join(base, f)} for f in files)
+            self._index_files()
             self.directory_scanned.emit(self.files)
         except Exception as e:
             self.message_emitted.emit(f"Error scanning: {str(e)}")
 
     def scan_recursive(self, path=None):
         if path: self.current_dir = path
-        self.files = [{'name': '..', 'type': 'dir', 'path': '..'}]
-        for root, _, files in os.walk(self.current_dir):
-            for f in sorted(files):
-                if os.path.splitext(f)[1].lower() in AUDIO_EXTENSIONS:
-                    rel_path = os.path.relpath(os.path.join(root, f), self.current_dir)
-                    self.files.append({'name': rel_path, 'type': 'file', 'path': rel_path})
+        base = os.path.abspath(self.current_dir)
+        self.files = [{'name': '..', 'type': 'dir', 'path': '..', 'abs_path': os.path.dirname(base)}]
+        for n, rel_path in enumerate(walk_audio_files(self.current_dir), 1):
+            self.files.append({'name': rel_path, 'type': 'file', 'path': rel_path, 'abs_path': os.path.join(base, rel_path)})
+            if n % SCAN_PROGRESS_EVERY == 0:
+                self.message_emitted.emit(f"Scanning... {n} files")
+        self._index_files()
         self.directory_scanned.emit(self.files)
 
     def search_local_files(self, query):
@@ -229,7 +232,7 @@ class PlayerEngine(QObject):
         try:
             for root, _, files in os.walk(self.current_dir):
                 for f in sorted(files):
-                    if query.lower() in f.lower() and os.path.splitext(f)[1].lower() in AUDIO_EXTENSIONS:
+                    if query.lower() in f.lower() and is_audio_file(f):
                         # Create a file object similar to scan_directory
                         full_path = os.path.join(root, f)
                         rel_path = os.path.relpath(full_path, self.current_dir)
@@ -239,56 +242,84 @@ class PlayerEngine(QObject):
             # For this feature, we likely want to show them in the list.
             # We replace self.files with search results for consistency in UI handling
             self.files = results
+            self._index_files()
             self.directory_scanned.emit(self.files)
         except Exception as e:
             self.message_emitted.emit(f"Search error: {str(e)}")
 
+    def _index_files(self):
+        # Positions of playable entries in self.files, rebuilt whenever the listing changes
+        self._file_indices = [i for i, f in enumerate(self.files) if f['type'] == 'file']
+
     def get_next_index(self, current_idx):
         if self.shuffle:
-            candidates = [i for i, f in enumerate(self.files) if f['type'] == 'file' and i != current_idx]
-            return random.choice(candidates) if candidates else None
-        idx = current_idx + 1
-        while idx < len(self.files):
-            if self.files[idx]['type'] == 'file': return idx
-            idx += 1
-        return None
-
-    def play_file(self, index_or_path):
+            candidates = self._file_indices
+            if not candidates or candidates == [current_idx]: return None
+            idx = random.choice(candidates)
+            while idx == current_idx: idx = random.choice(candidates)
+            return idx
+        j = bisect.bisect_right(self._file_indices, current_idx)
+        return self._file_indices[j] if j < len(self._file_indices) else None
+
+    def get_prev_index(self, current_idx):
+        if self.playback_history: return self.playback_history[-1]
+        j = bisect.bisect_left(self._file_indices, current_idx)
+        return self._file_indices[j - 1] if j > 0 else None
+
+    def play_previous(self):
+        # Walk back through what was played, then through the listing
+        if self.playback_history:
+            self.play_file(self.playback_history.pop(), push_history=False)
+        elif self.playing_index != -1:
+            idx = self.get_prev_index(self.playing_index)
+            if idx is not None: self.play_file(idx, push_history=False)
+
+    def play_file(self, index_or_path, push_history=True):
         if isinstance(index_or_path, int):
             index = index_or_path
             if 0 <= index < len(self.files):
-                if self.playing_index != -1:
+                if push_history and self.playing_index != -1:
                     self.playback_history.append(self.playing_index)
                 self.playing_index = index
                 path = os.path.join(self.current_dir, self.files[index]['path'])
-                self.metadata = {'title': self.files[index]['name'], 'artist': 'Local File'}
-                self._start_mpv(path)
+                self._play_local(path, self.files[index]['name'], self.files[index].get('abs_path'))
         else:
             path = index_or_path
-            self.metadata = {'title': os.path.basename(path), 'artist': 'Local File'}
-            self._start_mpv(path)
+            self._play_local(path, os.path.basename(path))
+
+    def _play_local(self, path, name, abs_path=None):
+        self._next_track()
+        self._meta_path = abs_path or os.path.abspath(path)
+        cached = self._meta_cache.get(self._meta_path)
+        self.metadata = cached or {'title': name, 'artist': 'Local File'}
+        self._start_mpv(path)
+        # A .lrc shipped with the track beats any network lookup
+        local = read_local_lrc(self._meta_path)
+        if local:
+            self._lyrics_local = True
+            self.lyrics = local
+            self.lyrics_loaded.emit(local)
+        # _start_mpv already published the cached tags; start on lyrics without waiting for mpv
+        if cached and not local and cached.get('artist') and cached.get('title'):
+            threading.Thread(target=self.fetch_lyrics,
+                             args=(cached['artist'], cached['title']),
+                             daemon=True).start()
 
     def play_stream(self, result):
+        self._next_track()
         self.playing_index = -1
+        self._meta_path = None
         self.metadata = {'title': result['title'], 'artist': result['artist']}
-        target = result.get('url') or result['id']
-        if len(target) == 11 and '.' not in target:
-             target = f"https://www.youtube.com/watch?v={target}"
-        self._start_mpv(target)
+        self._start_mpv(stream_target(result))
 
     def play_queue_item(self, item):
+        self._next_track()
         self.playing_index = -1
+        self._meta_path = None
         self.metadata = {'title': item.get('title', item.get('name', 'Unknown')), 
                          'artist': item.get('artist', 'Unknown')}
         
-        target = ""
-        if item.get('type') == 'file':
-            target = item['path']
-        else:
-            target = item.get('url') or item['id']
-            if len(target) == 11 and '.' not in target:
-                 target = f"https://www.youtube.com/watch?v={target}"
-                 
+        target = item['path'] if item.get('type') == 'file' else stream_target(item)
         self._start_mpv(target)
 
     def play_queue_index(self, index):
@@ -302,10 +333,17 @@ class PlayerEngine(QObject):
             self.queue_changed.emit(self.queue)
             self.play_queue_item(item)
 
+    def _next_track(self):
+        # Move the generation on before the next track's state is set: from here on
+        # ipc_loop drops whatever the outgoing mpv still reports
+        with self._event_lock:
+            self._mpv_gen += 1
+            return self._mpv_gen
+
     def _start_mpv(self, target):
         self.log(f"Starting MPV: {target}")
         if self.mpv_process:
-            self.ipc.send_command(["quit"])
+            self.ipc.send_raw(MpvIpcClient.CMD_QUIT)
             try: self.mpv_process.wait(timeout=0.2)
             except: self.mpv_process.kill()
 
@@ -314,10 +352,13 @@ class PlayerEngine(QObject):
         self.duration = 0
         # Reset last fetched key so re-playing the same song can refetch lyrics if needed
         self._last_fetched_key = None 
+        self._lyrics_local = False
         
         cmd = [
             self.mpv_bin,
             '--no-video',
+            # One audio-only format: no video+audio merge for mpv's yt-dlp hook to resolve
+            '--ytdl-format=bestaudio/best',
             self.ipc.get_mpv_flag(),
             f'--volume={self.volume}',
             '--idle',
@@ -335,14 +376,17 @@ class PlayerEngine(QObject):
             stdin=subprocess.DEVNULL, 
             stdout=subprocess.DEVNULL, 
             stderr=subprocess.DEVNULL,
-            env=env
+            env=env,
+            close_fds=True
         )
+        self._mpv_owner = (self.mpv_process, self._mpv_gen, self._meta_path)
+        self._mpv_started.set()
         self.status_changed.emit(False)
         self.track_changed.emit(self.metadata)
 
     def stop_music(self):
         if self.mpv_process:
-            self.ipc.send_command(["stop"])
+            self.ipc.send_raw(MpvIpcClient.CMD_STOP)
         self.playing_index = -1
         self.paused = False 
         self.status_changed.emit(True) 
@@ -362,11 +406,11 @@ class PlayerEngine(QObject):
              self.stop_music()
 
     def toggle_pause(self):
-        self.ipc.send_command(["cycle", "pause"])
+        self.ipc.send_raw(MpvIpcClient.CMD_PAUSE)
 
     def set_volume(self, value):
         self.volume = max(0, min(200, value))
-        self.ipc.send_command(["set_property", "volume", self.volume])
+        self.ipc.send_raw(MpvIpcClient.CMD_SET_VOLUME % self.volume)
         save_config({'volume': self.volume})
 
     def seek(self, position):
@@ -375,23 +419,12 @@ class PlayerEngine(QObject):
         self.position = position
         self.position_changed.emit(self.position, self.duration)
 
-    def is_in_queue(self, item):
-        if item.get('type') == 'file':
-            try:
-                abs_path = os.path.abspath(os.path.join(self.current_dir, item['path']))
-                for q_item in self.queue:
-                    if q_item['type'] == 'file' and q_item['path'] == abs_path:
-                        return True
-            except: pass
-        else:
-            target_id = item.get('id')
-            target_url = item.get('url')
-            for q_item in self.queue:
-                if q_item['type'] != 'file':
-                     if (target_id and q_item.get('id') == target_id) or \
-                        (target_url and q_item.get('url') == target_url):
-                         return True
-        return False
+    def queue_keys(self):
+        return queue_keys(self.queue)
+
+    def is_in_queue(self, item, keys=None):
+        # Pass keys=self.queue_keys() when checking many items against the same queue
+        return in_queue(item, keys or self.queue_keys(), self.current_dir)
 
     def add_to_queue(self, items):
         if not isinstance(items, list):
@@ -401,7 +434,7 @@ class PlayerEngine(QObject):
         for item in items:
             # Normalize item for queue
             if item.get('type') == 'file' and not os.path.isabs(item['path']):
-                item['path'] = os.path.abspath(os.path.join(self.current_dir, item['path']))
+                item['path'] = item.get('abs_path') or os.path.abspath(os.path.join(self.current_dir, item['path']))
             self.queue.append(item)
             added_count += 1
             
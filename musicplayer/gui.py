@@ -1,4 +1,5 @@
 import sys
+import bisect
 import os
 import threading
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
@@ -9,7 +10,7 @@ from PyQt6.QtCore import Qt, QTimer, pyqtSlot, QSize, pyqtSignal
 from PyQt6.QtGui import QFont, QColor, QPalette, QAction, QPixmap, QIcon, QKeySequence, QShortcut
 
 from .engine import PlayerEngine
-from .utils import format_time
+from .utils import format_time, lyric_times
 from . import __version__
 
 class CthulhuPulse(QLabel):
@@ -128,6 +129,8 @@ class MainWindow(QMainWindow):
         
         self.lyrics_area = QListWidget()
         self.lyrics_area.setStyleSheet("background: transparent; border: none;")
+        self._lyric_times = [] # Timestamps of the leading synced lines
+        self._lyric_row = -1
         
         player_layout.addWidget(self.lbl_title)
         player_layout.addWidget(self.lbl_artist)
@@ -258,6 +261,7 @@ class MainWindow(QMainWindow):
         btns_layout = QHBoxLayout()
         self.btn_prev = QPushButton()
         self.btn_prev.setIcon(self.style().standardIcon(QStyle.StandardPixmap.SP_MediaSkipBackward))
+        self.btn_prev.clicked.connect(self.engine.play_previous)
         
         self.btn_play = QPushButton()
         self.btn_play.setIcon(self.style().standardIcon(QStyle.StandardPixmap.SP_MediaPlay))
@@ -365,10 +369,11 @@ class MainWindow(QMainWindow):
 
     def refresh_list_highlights(self, list_widget):
         count = list_widget.count()
+        queued = self.engine.queue_keys()
         for i in range(count):
             item = list_widget.item(i)
             data = item.data(Qt.ItemDataRole.UserRole)
-            if self.engine.is_in_queue(data):
+            if self.engine.is_in_queue(data, queued):
                 item.setForeground(QColor(0, 255, 0))
             else:
                 # Reset color (assuming default is white/theme dependent, or explicitly set white)
@@ -393,6 +398,16 @@ class MainWindow(QMainWindow):
             self.progress_slider.setMaximum(int(total))
             if not self.is_seeking:
                 self.progress_slider.setValue(int(current))
+        self.highlight_lyric(current)
+
+    def highlight_lyric(self, pos):
+        # Bisect the timestamps; only touch the widget when the line changes
+        if not self._lyric_times: return
+        row = max(0, bisect.bisect_right(self._lyric_times, pos) - 1)
+        if row != self._lyric_row:
+            self._lyric_row = row
+            self.lyrics_area.setCurrentRow(row)
+            self.lyrics_area.scrollToItem(self.lyrics_area.item(row), QAbstractItemView.ScrollHint.PositionAtCenter)
 
     def on_seek_pressed(self):
         self.is_seeking = True
@@ -412,11 +427,12 @@ class MainWindow(QMainWindow):
     def populate_file_list(self, files):
         self.file_list.clear()
         self.path_input.setText(self.engine.current_dir)
+        queued = self.engine.queue_keys()
         for f in files:
             icon = "📁 " if f['type'] == 'dir' else "🎵 "
             item = QListWidgetItem(f"{icon}{f['name']}")
             item.setData(Qt.ItemDataRole.UserRole, f)
-            if self.engine.is_in_queue(f):
+            if self.engine.is_in_queue(f, queued):
                 item.setForeground(QColor(0, 255, 0))
             self.file_list.addItem(item)
         self.refresh_list_highlights(self.file_list)
@@ -438,11 +454,13 @@ class MainWindow(QMainWindow):
         self.lyrics_area.clear()
         for line in lyrics:
             self.lyrics_area.addItem(line['text'])
+        self._lyric_times = lyric_times(lyrics)
+        self._lyric_row = -1
 
     def on_file_double_clicked(self, item):
         data = item.data(Qt.ItemDataRole.UserRole)
         if data['type'] == 'dir':
-            new_path = os.path.abspath(os.path.join(self.engine.current_dir, data['path']))
+            new_path = data.get('abs_path') or os.path.abspath(os.path.join(self.engine.current_dir, data['path']))
             self.lib_filter.clear() # Clear filter on navigation
             self.engine.scan_directory(new_path)
         else:
@@ -483,10 +501,11 @@ class MainWindow(QMainWindow):
     @pyqtSlot(list)
     def show_search_results(self, results):
         self.search_list.clear()
+        queued = self.engine.queue_keys()
         for res in results:
             item = QListWidgetItem(f"🌐 {res['title']} - {res['artist']}")
             item.setData(Qt.ItemDataRole.UserRole, res)
-            if self.engine.is_in_queue(res):
+            if self.engine.is_in_queue(res, queued):
                 item.setForeground(QColor(0, 255, 0))
             self.search_list.addItem(item)
         self.tabs.setCurrentIndex(2)
@@ -5,7 +5,24 @@ import time
 import json
 import tempfile
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def parse_message(data):
+    """Decode one mpv JSON message from bytes; orjson is used when installed"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
 class MpvIpcClient:
+    # Pre-encoded payloads for commands sent on every keypress
+    CMD_PAUSE = b'{"command":["cycle","pause"]}\n'
+    CMD_QUIT = b'{"command":["quit"]}\n'
+    CMD_STOP = b'{"command":["stop"]}\n'
+    CMD_SET_VOLUME = b'{"command":["set_property","volume",%d]}\n'
+
     def __init__(self):
         self.socket_path = self._get_socket_path()
         self.is_windows = sys.platform == 'win32'
@@ -21,18 +38,22 @@ class MpvIpcClient:
         return f'--input-ipc-server={self.socket_path}'
 
     def send_command(self, command):
+        message = json.dumps({"command": command}) + '\n'
+        return self.send_raw(message.encode('utf-8'))
+
+    def send_raw(self, message):
+        """Send an already encoded, newline terminated JSON command"""
         if self.is_windows:
-            return self._send_windows(command)
+            return self._send_windows(message)
         else:
-            return self._send_unix(command)
+            return self._send_unix(message)
 
-    def _send_unix(self, command):
+    def _send_unix(self, message):
         if not os.path.exists(self.socket_path): return None
         try:
             client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
             client.connect(self.socket_path)
-            message = json.dumps({"command": command}) + '\n'
-            client.sendall(message.encode('utf-8'))
+            client.sendall(message)
             client.settimeout(0.1)
             response = b""
             try:
@@ -46,7 +67,7 @@ class MpvIpcClient:
             return response
         except: return None
 
-    def _send_windows(self, command):
+    def _send_windows(self, message):
         # Named pipe client implementation for Windows
         # MPV creates the pipe server, we connect as client
         try:
@@ -54,11 +75,9 @@ class MpvIpcClient:
             # However, blocking/transactional nature can be tricky.
             # Using wait_for_pipe logic is safer but let's try direct open first.
             
-            message = json.dumps({"command": command}) + '\n'
-            
             # Open for read/write
             with open(self.socket_path, 'r+b', buffering=0) as f:
-                f.write(message.encode('utf-8'))
+                f.write(message)
                 f.flush()
                 # Read response (naive)
                 # MPV sends one line per response usually
@@ -69,6 +88,59 @@ class MpvIpcClient:
         except Exception:
             return None
 
+    def open_events(self, properties, timeout=3.0):
+        """
+        Open a dedicated connection that observes the given properties.
+        Returns an iterator of mpv event dicts, or None if mpv is not reachable.
+        The iterator ends when mpv closes the connection (e.g. on quit).
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                stream = self._connect_stream()
+                break
+            except OSError:
+                if time.monotonic() > deadline: return None
+                time.sleep(0.05)
+
+        # All subscriptions go out in one write; the Windows pipe is unbuffered
+        payload = b''.join(json.dumps({"command": ["observe_property", i, prop]}).encode('utf-8') + b'\n'
+                           for i, prop in enumerate(properties, 1))
+        try:
+            stream.write(payload)
+            stream.flush()
+        except OSError:
+            stream.close()
+            return None
+        return self._iter_events(stream)
+
+    def _connect_stream(self):
+        if self.is_windows:
+            return open(self.socket_path, 'r+b', buffering=0)
+        client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            client.connect(self.socket_path)
+        except OSError:
+            client.close()
+            raise
+        stream = client.makefile('rwb')
+        client.close() # The file object keeps the connection open
+        return stream
+
+    def _iter_events(self, stream):
+        try:
+            for line in iter(stream.readline, b''):
+                try: message = parse_message(line)
+                except ValueError: continue
+                # Command replies carry "error"/"request_id" instead of "event"
+                if 'event' in message:
+                    yield message
+        except OSError:
+            pass
+        finally:
+            try: stream.close()
+            except OSError: pass
+
     def cleanup(self):
         if not self.is_windows and os.path.exists(self.socket_path):
             try: os.remove(self.socket_path)
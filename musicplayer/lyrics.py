@@ -0,0 +1,76 @@
+import functools
+import urllib.parse
+import urllib.error
+import concurrent.futures
+
+from .utils import slugify, parse_letras_html, lyrics_from_lrclib, pick_lrclib_match
+from .net import HttpSession, loads_json
+
+# Names for log lines, in query_providers' futures order
+PROVIDER_NAMES = ("LRCLIB", "letras.mus.br", "LRCLIB search")
+
+# Keep-alive connections to the lyrics providers, shared by all fetch threads
+_http = HttpSession()
+_pool = concurrent.futures.ThreadPoolExecutor(max_workers=4)
+
+def shutdown():
+    # Exit only: drop queued lookups so they don't hold the interpreter open
+    try: _pool.shutdown(wait=False, cancel_futures=True)
+    except TypeError: _pool.shutdown(wait=False) # Python 3.8
+
+def fetch_from_letras_mus_br(artist, title):
+    try:
+        slug_artist = slugify(artist)
+        slug_title = slugify(title)
+        url = f"https://www.letras.mus.br/{slug_artist}/{slug_title}/"
+        html = _http.get(url, headers={'User-Agent': 'Mozilla/5.0'})
+        return parse_letras_html(html)
+    except: pass
+    return None
+
+@functools.lru_cache(maxsize=128)
+def fetch_lrclib(artist, title):
+    # Network errors propagate so that failed lookups are not cached
+    url = f"https://lrclib.net/api/get?artist_name={urllib.parse.quote(artist)}&track_name={urllib.parse.quote(title)}"
+    body = _http.get(url, headers={'User-Agent': 'CLI-Music-Player/1.0'})
+    return lyrics_from_lrclib(loads_json(body))
+
+@functools.lru_cache(maxsize=128)
+def search_lrclib(artist, title):
+    # Catches tracks whose exact artist/title lookup misses (punctuation, "feat.", ...)
+    url = f"https://lrclib.net/api/search?q={urllib.parse.quote(f'{artist} {title}')}"
+    body = _http.get(url, headers={'User-Agent': 'CLI-Music-Player/1.0'})
+    return pick_lrclib_match(loads_json(body), artist, title)
+
+def query_providers(artist, title, log=None):
+    """Race LRCLib (exact and search) and letras.mus.br; returns (lyrics or None, lrclib_answered)"""
+    key = (artist.lower().strip(), title.lower().strip())
+    lrclib = _pool.submit(fetch_lrclib, *key)
+    search = _pool.submit(search_lrclib, *key)
+    letras = _pool.submit(fetch_from_letras_mus_br, artist, title)
+    futures = (lrclib, letras, search) # Plain-text preference order
+    plain = {}
+    # Only a real answer from LRCLib (not a network failure) may be cached as a miss
+    lrclib_answered = False
+    try:
+        for future in concurrent.futures.as_completed(futures, timeout=12):
+            try:
+                res = future.result()
+            except Exception as e:
+                if future is lrclib and isinstance(e, urllib.error.HTTPError):
+                    lrclib_answered = e.code == 404
+                if log: log(f"{PROVIDER_NAMES[futures.index(future)]} Error: {e}")
+                continue
+            if future is lrclib: lrclib_answered = True
+            if not res: continue
+            # Synced lyrics win outright, as does LRCLib's exact match
+            if future is lrclib or any(l['time'] is not None for l in res):
+                return res, lrclib_answered
+            plain[future] = res
+    except concurrent.futures.TimeoutError:
+        if log: log("Lyrics providers timed out")
+    finally:
+        for future in futures: future.cancel()
+    for future in futures:
+        if future in plain: return plain[future], lrclib_answered
+    return None, lrclib_answered
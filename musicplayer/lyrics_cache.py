@@ -0,0 +1,64 @@
+import os
+import json
+import time
+import hashlib
+import threading
+import collections
+
+from .config import get_cache_dir as _get_cache_dir, write_json_atomic
+
+# A cached "not found" is trusted for this long before the providers are asked again
+NEGATIVE_TTL = 24 * 60 * 60
+# Found lyrics are refreshed after this long (providers fix timings and typos)
+POSITIVE_TTL = 30 * 24 * 60 * 60
+
+# Most recently used entries, so switching back to a track skips disk and network
+MEMORY_CAP = 100
+_memory = collections.OrderedDict()
+_memory_lock = threading.Lock()
+
+def _remember(key, entry):
+    with _memory_lock:
+        _memory[key] = entry
+        _memory.move_to_end(key)
+        if len(_memory) > MEMORY_CAP:
+            _memory.popitem(last=False)
+
+def get_cache_dir():
+    """Get the OS-specific directory holding cached lyrics"""
+    return _get_cache_dir("lyrics")
+
+def _cache_key(artist, title):
+    text = f"{artist.strip()}\x00{title.strip()}".lower()
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+def load_lyrics(artist, title, memory_only=False):
+    """Return cached lyrics, [] for a cached miss, or None if nothing usable is cached"""
+    key = _cache_key(artist, title)
+    with _memory_lock:
+        entry = _memory.get(key)
+        if entry is not None: _memory.move_to_end(key)
+    if entry is None:
+        if memory_only:
+            return None
+        path = os.path.join(get_cache_dir(), f"{key}.json")
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except:
+            return None
+        _remember(key, entry)
+
+    age = time.time() - entry.get('ts', 0)
+    if entry.get('data') is None:
+        return None if age > NEGATIVE_TTL else []
+    return None if age > POSITIVE_TTL else entry['data']
+
+def save_lyrics(artist, title, lyrics):
+    """Cache lyrics in memory and on disk; pass None to record a miss"""
+    key = _cache_key(artist, title)
+    entry = {'ts': time.time(), 'data': lyrics}
+    _remember(key, entry)
+    return write_json_atomic(os.path.join(get_cache_dir(), f"{key}.json"), entry)
@@ -6,28 +6,63 @@ import signal
 import sys
 import shutil
 import random
-import urllib.request
-import urllib.parse
-import re
+import bisect
+import collections
 import socket
-import json
 import tempfile
 import subprocess
 import atexit
+import itertools
+import selectors
+import concurrent.futures
 
-from .utils import slugify, format_time, parse_lrc
+from .utils import read_local_lrc, lyric_times, stream_target, queue_keys, in_queue, format_time, scan_audio_dir, walk_audio_files
 from .search import OnlineSearcher
 from .mpv_setup import get_mpv_path, download_mpv
 from .config import load_config, save_config
-from .ipc import MpvIpcClient
+from .ipc import MpvIpcClient, parse_message
+from .lyrics import query_providers, shutdown as shutdown_lyrics
+from .lyrics_cache import load_lyrics, save_lyrics
 
-# Supported audio extensions
-AUDIO_EXTENSIONS = {'.mp3', '.wav', '.flac', '.ogg', '.m4a', '.wma', '.aac', '.opus'}
+# mpv properties pushed to ipc_loop via observe_property
+OBSERVED_PROPERTIES = ("time-pos", "duration", "metadata", "pause", "idle-active", "paused-for-cache")
+# The only events that can identify a new track, and so start its lyrics fetch
+LYRICS_EVENTS = ("start-file", "file-loaded")
+LYRICS_PROPERTIES = ("metadata", "idle-active")
+
+# Progress bar fill characters, sliced per frame instead of rebuilt
+_BAR_MAX = 1024
+_BAR_FILL = "=" * _BAR_MAX
+_BAR_EMPTY = "-" * _BAR_MAX
+
+# Written to wake run(); eventfd needs a full 8-byte counter increment
+_WAKE_TOKEN = (1).to_bytes(8, sys.byteorder)
+
+# Rows of the current listing kept painted in the list pad around the viewport
+_PAD_ROWS = 512
+
+# Files between progress updates while a recursive scan runs
+SCAN_PROGRESS_EVERY = 500
+
+# Seconds between checks of the clock-driven player view state (progress, animation, synced lyric)
+REDRAW_INTERVAL = 0.25
+# Longest input wait: ncurses' SIGWINCH handler doesn't interrupt select(),
+# so a pending KEY_RESIZE is only seen on the next getch
+RESIZE_POLL = 0.25
+# Seconds per frame of the idle animation
+ANIM_INTERVAL = 0.4
+
+def _browser_label(item):
+    return item['name']
+
+def _search_label(item):
+    return f"{item['title']} - {item['artist']}"
 
 class MusicPlayer:
-    def __init__(self, stdscr, debug=False):
+    def __init__(self, stdscr, debug=False, mpv_bin=None):
         self.stdscr = stdscr
         self.debug = debug
+        self._screen_size = stdscr.getmaxyx() # (height, width), refreshed on KEY_RESIZE
         
         # Determine start directory
         self.config = load_config()
@@ -40,20 +75,14 @@ class MusicPlayer:
             
         self.current_dir = start_dir
         self.files = []
+        self._file_indices = []
         self.selected_index = 0
         self.scroll_offset = 0
         self.message = "" 
         self.message_time = 0
         
-        # Check MPV
-        self.mpv_bin = get_mpv_path()
-        if not self.mpv_bin:
-            self.mpv_bin = download_mpv()
-            
-        if not self.mpv_bin:
-            print("Error: MPV player not found.")
-            print("Please install 'mpv' via your package manager (e.g., sudo pacman -S mpv) or add it to PATH.")
-            sys.exit(1)
+        # MPV is resolved (and downloaded if needed) by main() before curses starts
+        self.mpv_bin = mpv_bin or get_mpv_path()
 
         # State
         self.playing_index = -1
@@ -63,31 +92,74 @@ class MusicPlayer:
         self.view_mode = 'player'
         self.shuffle = False
         self.library_mode = False 
-        self.playback_history = [] 
+        self.playback_history = collections.deque(maxlen=256) 
         
         # Search State
         self.searcher = OnlineSearcher()
         self.search_results = []
-        self.search_query = []
+        self.search_query = ""
         self.is_searching_input = False
+        # Searches run on a worker; a newer query's generation drops older results
+        self._search_gens = itertools.count(1)
+        self._search_gen = 0
+        self._search_pending = None # Query shown in the header while its search runs
         self.queue = []
         
         # MPV State
         self.mpv_process = None
+        # mpv is stopped/spawned on a worker so track changes don't stall input;
+        # the lock guards mpv_process and the generation drops superseded starts
+        self._mpv_lock = threading.RLock()
+        self._mpv_exec = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        self._mpv_gens = itertools.count(1)
+        self._mpv_gen = 0
+        # The running mpv with the generation and local path it was started for; ipc_loop
+        # drops its events once the generation moves on (under _event_lock)
+        self._mpv_owner = (None, 0, None)
+        self._event_lock = threading.RLock()
+        self._mpv_started = threading.Event()
         self.ipc = MpvIpcClient()
         self.duration = 0
-        self.position = 0
+        self._buffering = False # mpv is stalled waiting on the network (paused-for-cache)
+        self._reset_position()
         self.metadata = {'title': 'No Music Playing', 'artist': 'Press [b] for Library'}
+        # Tags mpv reported per local file, so replays show them (and fetch lyrics) right away
+        self._meta_cache = {}
+        self._meta_path = None
         
         # Lyrics State
         self.lyrics = None
         self.show_lyrics = False
         self.lyrics_scroll_offset = 0
         self.current_song_lyrics_fetched = False
+        self._lyrics_key = None
+        self._lyrics_inflight = set()
+        self._lyrics_lock = threading.Lock() # [l] and ipc_loop may both try to start the fetch
         
         # Animation State
         self.anim_frame = 0
-        self.last_anim_time = time.time()
+
+        # Redraw State
+        self._dirty = True
+        self._last_tick = 0
+        self._drawn_clock = None
+        self._drawn_view = None # View on stdscr; list views redraw only their header row over it
+        self._screen_cleared = True # stdscr was erased for the frame being drawn
+        self._pad_row = None # Pad row last shown at the top of the list viewport
+        self._list_pad = None
+        self._status_win = None
+        self._list_sig = None
+        self._pad_base = 0
+        self._pad_sel = -1
+        self._pad_items = []
+        self._pad_label = None
+        self._pad_text = {} # Row text by index into _pad_items, built on first paint
+        self._pad_queued = None
+
+        # Input wait state (POSIX only, set up in run())
+        self._selector = None
+        self._wake_r = None
+        self._wake_w = None
         
         # UI Colors
         curses.start_color()
@@ -99,7 +171,12 @@ class MusicPlayer:
         curses.init_pair(5, curses.COLOR_CYAN, -1)
         curses.init_pair(6, curses.COLOR_WHITE, -1)
         curses.init_pair(7, curses.COLOR_GREEN, -1)
+        # Pair attributes resolved once; the draw paths index this instead of calling color_pair
+        self._pairs = [curses.color_pair(i) for i in range(8)]
         curses.curs_set(0)
+        # No caret outside search input: don't spend a cursor move on every update
+        self.stdscr.leaveok(True)
+        self._caret = False
         self.stdscr.nodelay(1)
         self.stdscr.timeout(100)
 
@@ -107,6 +184,9 @@ class MusicPlayer:
         atexit.register(self.cleanup)
         signal.signal(signal.SIGINT, self.handle_signal)
         signal.signal(signal.SIGTERM, self.handle_signal)
+        # mpv runs in its own session, so a closed terminal's hangup reaches only us
+        if hasattr(signal, 'SIGHUP'):
+            signal.signal(signal.SIGHUP, self.handle_signal)
 
         self.scan_directory()
         
@@ -114,241 +194,337 @@ class MusicPlayer:
         self.monitor_thread = threading.Thread(target=self.ipc_loop, daemon=True)
         self.monitor_thread.start()
 
-    def is_in_queue(self, item):
+    @property
+    def position(self):
+        # Interpolate between mpv time-pos updates so the UI can tick without IPC
+        if self.paused or self._buffering or self._pos_t0 is None or not self.mpv_process:
+            return self._pos_base
+        pos = self._pos_base + (time.monotonic() - self._pos_t0)
+        return min(pos, self.duration) if self.duration > 0 else pos
+
+    @position.setter
+    def position(self, value):
+        self._pos_base = value
+        self._pos_t0 = time.monotonic()
+
+    def _reset_position(self):
+        # Hold at 0 until mpv reports a time-pos: opening a stream can take seconds
+        self._pos_base = 0
+        self._pos_t0 = None
+
+    @property
+    def lyrics(self):
+        return self._lyrics
+
+    @lyrics.setter
+    def lyrics(self, value):
+        self._lyric_times = lyric_times(value)
+        self._lyrics_synced = any(l['time'] is not None for l in value or ())
+        self._lyrics = value
+
+    def queue_keys(self):
+        return queue_keys(self.queue)
+
+    def is_in_queue(self, item, keys=None):
         # item can be from self.files (local) or self.search_results (stream)
-        # Check local file
-        if item.get('type') == 'file':
-            # Resolve absolute path for the item to check against queue
-            # Note: item from browser is relative or just name
-            try:
-                abs_path = os.path.abspath(os.path.join(self.current_dir, item['path']))
-                for q_item in self.queue:
-                    if q_item['type'] == 'file' and q_item['path'] == abs_path:
-                        return True
-            except: pass
-        else:
-            # Check stream by ID or URL
-            target_id = item.get('id')
-            target_url = item.get('url')
-            for q_item in self.queue:
-                if q_item['type'] != 'file':
-                     if (target_id and q_item.get('id') == target_id) or \
-                        (target_url and q_item.get('url') == target_url):
-                         return True
-        return False
+        # Pass keys=self.queue_keys() when checking many items against the same queue
+        return in_queue(item, keys or self.queue_keys(), self.current_dir)
 
     def handle_signal(self, signum, frame):
         self.cleanup()
         sys.exit(0)
 
     def cleanup(self):
-        if self.mpv_process:
-            try:
-                self.ipc.send_command(["quit"])
-                try: self.mpv_process.wait(timeout=0.5)
-                except subprocess.TimeoutExpired: self.mpv_process.kill()
-            except:
-                try: self.mpv_process.kill()
-                except: pass
-            self.mpv_process = None
-            
-        self.ipc.cleanup()
-        
-        # Cleanup Cache
-        try:
-            cache_dir = os.path.join(tempfile.gettempdir(), "musicplayer_cthulhu_cache")
-            if os.path.exists(cache_dir):
-                shutil.rmtree(cache_dir)
-        except: pass
+        # Exit only: stop mpv and clear the cache dir
+        self._stop_mpv()
+        self._mpv_started.set() # Let ipc_loop notice running is False
+        self.searcher.close()
+        shutdown_lyrics()
+
+        # Cleanup Cache (lyrics live in the persistent user cache dir)
+        # Known path: remove it directly, a missing dir is simply ignored
+        shutil.rmtree(os.path.join(tempfile.gettempdir(), "musicplayer_cthulhu_cache"), ignore_errors=True)
+
+    def _stop_mpv(self):
+        with self._mpv_lock:
+            if self.mpv_process:
+                try:
+                    self.ipc.send_raw(MpvIpcClient.CMD_QUIT)
+                    try: self.mpv_process.wait(timeout=0.3)
+                    except subprocess.TimeoutExpired:
+                        self.mpv_process.terminate()
+                        try: self.mpv_process.wait(timeout=0.3)
+                        except subprocess.TimeoutExpired: self.mpv_process.kill()
+                except:
+                    try: self.mpv_process.kill()
+                    except: pass
+                self.mpv_process = None
+
+            self.ipc.cleanup()
 
     def get_property(self, prop):
         res = self.ipc.send_command(["get_property", prop])
         if res:
             try:
-                data = json.loads(res.decode('utf-8').strip())
+                data = parse_message(res.strip())
                 return data.get("data")
             except: pass
         return None
 
     def ipc_loop(self):
         while self.running:
-            if self.mpv_process and self.mpv_process.poll() is None:
-                pos = self.get_property("time-pos")
-                if pos is not None: self.position = float(pos)
-                dur = self.get_property("duration")
-                if dur is not None: self.duration = float(dur)
-                
-                meta = self.get_property("metadata")
-                if meta:
-                    new_title = meta.get('title') or meta.get('media-title')
-                    new_artist = meta.get('artist')
-                    if new_title: self.metadata['title'] = new_title
-                    if new_artist: self.metadata['artist'] = new_artist
-                
-                if self.show_lyrics and not self.current_song_lyrics_fetched:
-                    artist = self.metadata.get('artist')
-                    title = self.metadata.get('title')
-                    if artist and title and artist != "Unknown" and title != "Unknown":
-                        self.current_song_lyrics_fetched = True
-                        threading.Thread(target=self.fetch_lyrics, args=(artist, title), daemon=True).start()
-
-                paused = self.get_property("pause")
-                if paused is not None: self.paused = paused
-                
-                idle = self.get_property("idle-active")
-                if idle is True: self.handle_end_of_file()
-            
-            time.sleep(0.5)
-
-    def fetch_from_letras_mus_br(self, artist, title):
-        try:
-            slug_artist = slugify(artist)
-            slug_title = slugify(title)
-            url = f"https://www.letras.mus.br/{slug_artist}/{slug_title}/"
-            req = urllib.request.Request(url, headers={'User-Agent': 'Mozilla/5.0'})
-            with urllib.request.urlopen(req, timeout=10) as response:
-                html = response.read().decode('utf-8', errors='ignore')
-                match = re.search(r'<div class="cnt-letra[^\"]*"> (.*?)</div>', html, re.DOTALL)
-                if match:
-                    raw_html = match.group(1)
-                    text = re.sub(r'<br\s*/?>', '\n', raw_html)
-                    text = re.sub(r'<[^>]+>', '', text)
-                    text = text.replace('&lt;', '<').replace('&gt;', '>').replace('&amp;', '&').replace('&quot;', '"')
-                    lines = [line.strip() for line in text.split('\n')]
-                    return [{'time': None, 'text': line} for line in lines]
-        except: pass
-        return None
+            # Cleared before the check so a start in between is not missed
+            self._mpv_started.clear()
+            process, gen, meta_path = self._mpv_owner
+            if not (process and process.poll() is None):
+                self._mpv_started.wait() # Idle until the next mpv is spawned
+                continue
+            events = self.ipc.open_events(OBSERVED_PROPERTIES)
+            if events is None:
+                time.sleep(0.1)
+                continue
+            # Ends when this mpv instance quits; the outer loop then attaches to the next one
+            for event in events:
+                if not self.running or self.mpv_process is not process: break
+                kind = event.get('event')
+                with self._event_lock:
+                    # Another track was started; this mpv is on its way out
+                    if gen != self._mpv_gen: continue
+                    if kind == 'property-change':
+                        self.handle_property_change(event.get('name'), event.get('data'), meta_path)
+                # time-pos alone arrives several times a second; skip the lyrics lock for it
+                if kind in LYRICS_EVENTS or (kind == 'property-change' and event.get('name') in LYRICS_PROPERTIES):
+                    self.maybe_fetch_lyrics()
+
+    def handle_property_change(self, name, value, meta_path=None):
+        if name == 'time-pos':
+            if value is not None: self.position = float(value)
+        elif name == 'duration':
+            if value is not None: self.duration = float(value)
+        elif name == 'paused-for-cache':
+            buffering = bool(value)
+            if buffering != self._buffering:
+                # Re-anchor so the clock freezes while buffering and resumes from there
+                pos = self.position
+                self._buffering = buffering
+                if self._pos_t0 is not None: self.position = pos
+        elif name == 'metadata':
+            if value:
+                # Publish a fresh dict instead of mutating the one the UI thread reads
+                current = self.metadata
+                new_title = value.get('title') or value.get('media-title') or current.get('title')
+                new_artist = value.get('artist') or current.get('artist')
+                if new_title != current.get('title') or new_artist != current.get('artist'):
+                    self.metadata = dict(current, title=new_title, artist=new_artist)
+                    self._mark_dirty()
+                # Once per file, under the path its mpv was started with
+                if meta_path and meta_path not in self._meta_cache:
+                    self._meta_cache[meta_path] = {'title': new_title, 'artist': new_artist}
+        elif name == 'pause':
+            if value is not None and value != self.paused:
+                self.paused = value
+                self._mark_dirty()
+        elif name == 'idle-active':
+            if value is True:
+                self.handle_end_of_file()
+                self._mark_dirty()
+
+    def maybe_fetch_lyrics(self):
+        # Fetch as soon as the track is identified, so toggling [l] finds them ready
+        with self._lyrics_lock:
+            # Nothing playing: the metadata is just the idle placeholder
+            if self.current_song_lyrics_fetched or self.mpv_process is None: return
+            snapshot = self.metadata
+            artist = snapshot.get('artist')
+            title = snapshot.get('title')
+            # "Local File" is a placeholder until mpv reports the file's tags
+            if artist and title and artist not in ("Unknown", "Local File") and title != "Unknown":
+                self.current_song_lyrics_fetched = True
+                key = (artist, title)
+                self._lyrics_key = key
+                # Recently played tracks are answered from memory without a thread
+                cached = load_lyrics(artist, title, memory_only=True)
+                if cached is not None:
+                    self.lyrics = cached or [{'time': None, 'text': "Lyrics not found."}]
+                    self._mark_dirty()
+                elif key not in self._lyrics_inflight:
+                    self._lyrics_inflight.add(key)
+                    threading.Thread(target=self._lyrics_worker, args=key, daemon=True).start()
+
+    def _lyrics_worker(self, artist, title):
+        try: self.fetch_lyrics(artist, title)
+        finally: self._lyrics_inflight.discard((artist, title))
+
+    def _lyrics_wanted(self, artist, title):
+        # False once the player moved on to another track
+        return self._lyrics_key == (artist, title)
 
     def fetch_lyrics(self, artist, title):
-        self.lyrics = [{'time': None, 'text': "Loading lyrics..."}]
-        found_lyrics = False
-        try:
-            url = f"https://lrclib.net/api/get?artist_name={urllib.parse.quote(artist)}&track_name={urllib.parse.quote(title)}"
-            req = urllib.request.Request(url, headers={'User-Agent': 'CLI-Music-Player/1.0'})
-            with urllib.request.urlopen(req, timeout=10) as response:
-                data = json.loads(response.read().decode())
-                if data.get('syncedLyrics'):
-                    self.lyrics = parse_lrc(data['syncedLyrics'])
-                    found_lyrics = True
-                elif data.get('plainLyrics'):
-                    self.lyrics = [{'time': None, 'text': l} for l in data['plainLyrics'].split('\n')]
-                    found_lyrics = True
-        except: pass
-        
-        if not found_lyrics:
-             res = self.fetch_from_letras_mus_br(artist, title)
-             if res:
-                 self.lyrics = res
-                 found_lyrics = True
+        cached = load_lyrics(artist, title)
+        if cached is not None:
+            if self._lyrics_wanted(artist, title):
+                self.lyrics = cached or [{'time': None, 'text': "Lyrics not found."}]
+                self._mark_dirty()
+            return
 
-        if not found_lyrics:
-             self.lyrics = [{'time': None, 'text': "Lyrics not found."}]
+        if self._lyrics_wanted(artist, title):
+            self.lyrics = [{'time': None, 'text': "Loading lyrics..."}]
+        res, lrclib_answered = query_providers(artist, title)
+        if res or lrclib_answered:
+            save_lyrics(artist, title, res or None)
+        # Still cached above for when the track comes round again
+        if self._lyrics_wanted(artist, title):
+            self.lyrics = res or [{'time': None, 'text': "Lyrics not found."}]
+            self._mark_dirty()
 
     def scan_directory(self):
         self.library_mode = False
         self.files = []
+        self._list_sig = None
         try:
-            items = sorted(os.listdir(self.current_dir))
-            self.files.append({'name': '..', 'type': 'dir', 'path': '..'}) # Added missing closing parenthesis
-            for item in items:
-                full_path = os.path.join(self.current_dir, item)
-                if os.path.isdir(full_path) and not item.startswith('.'):
-                    self.files.append({'name': item, 'type': 'dir', 'path': item})
-                elif os.path.isfile(full_path):
-                    if os.path.splitext(item)[1].lower() in AUDIO_EXTENSIONS:
-                        self.files.append({'name': item, 'type': 'file', 'path': item})
+            dirs, files = scan_audio_dir(self.current_dir)
+            base = os.path.abspath(self.current_dir)
+            self.files.append({'name': '..', 'type': 'dir', 'path': '..', 'abs_path': os.path.dirname(base)})
+            self.files.extend({'name': d, 'type': 'dir', 'path': d, 'abs_path': os.path.join(base, d)} for d in dirs)
+            self.files.extend({'name': f, 'type': 'file', 'path': f, 'abs_path': os.path.join(base, f)} for f in files)
             self.selected_index = 0
             self.scroll_offset = 0
         except: pass
+        self._index_files()
 
     def scan_recursive(self):
         self.library_mode = True
-        self.files = [{'name': '..', 'type': 'dir', 'path': '..'}] # Added missing closing parenthesis
-        for root, _, files in os.walk(self.current_dir):
-            for f in sorted(files):
-                if os.path.splitext(f)[1].lower() in AUDIO_EXTENSIONS:
-                    path = os.path.relpath(os.path.join(root, f), self.current_dir)
-                    self.files.append({'name': path, 'type': 'file', 'path': path})
+        self._list_sig = None
+        base = os.path.abspath(self.current_dir)
+        self.files = [{'name': '..', 'type': 'dir', 'path': '..', 'abs_path': os.path.dirname(base)}]
+        for n, path in enumerate(walk_audio_files(self.current_dir), 1):
+            self.files.append({'name': path, 'type': 'file', 'path': path, 'abs_path': os.path.join(base, path)})
+            if n % SCAN_PROGRESS_EVERY == 0:
+                # Big libraries take a while: show the count so the UI doesn't look frozen
+                try:
+                    self.stdscr.addstr(0, 0, f" Scanning... {n} files ")
+                    self.stdscr.refresh()
+                except: pass
+        self._index_files()
         self.selected_index = 0
 
+    def _index_files(self):
+        # Positions of playable entries in self.files, rebuilt whenever the listing changes
+        self._file_indices = [i for i, f in enumerate(self.files) if f['type'] == 'file']
+
     def get_next_index(self, current_idx):
         if self.shuffle:
-            candidates = [i for i, f in enumerate(self.files) if f['type'] == 'file' and i != current_idx]
-            return random.choice(candidates) if candidates else None
-        idx = current_idx + 1
-        while idx < len(self.files):
-            if self.files[idx]['type'] == 'file': return idx
-            idx += 1
-        return None
+            candidates = self._file_indices
+            if not candidates or candidates == [current_idx]: return None
+            idx = random.choice(candidates)
+            while idx == current_idx: idx = random.choice(candidates)
+            return idx
+        j = bisect.bisect_right(self._file_indices, current_idx)
+        return self._file_indices[j] if j < len(self._file_indices) else None
 
     def get_prev_index(self, current_idx):
         if self.playback_history: return self.playback_history[-1]
-        idx = current_idx - 1
-        while idx >= 0:
-            if self.files[idx]['type'] == 'file': return idx
-            idx -= 1
-        return None
+        j = bisect.bisect_left(self._file_indices, current_idx)
+        return self._file_indices[j - 1] if j > 0 else None
+
+    def play_previous(self):
+        # Walk back through what was played, then through the listing
+        if self.playback_history:
+            self.play_file(self.playback_history.pop(), push_history=False)
+        elif self.playing_index != -1:
+            idx = self.get_prev_index(self.playing_index)
+            if idx is not None: self.play_file(idx, push_history=False)
+
+    def _next_track(self):
+        # Move the generation on before the next track's state is set: from here on
+        # ipc_loop drops whatever the outgoing mpv still reports
+        with self._event_lock:
+            self._mpv_gen = gen = next(self._mpv_gens)
+        return gen
 
     def play_file(self, index, push_history=True):
-        self.cleanup()
         if 0 <= index < len(self.files):
+            self._next_track()
             if push_history and self.playing_index != -1:
                 self.playback_history.append(self.playing_index)
             self.playing_index = index
             path = os.path.join(self.current_dir, self.files[index]['path'])
-            self.metadata = {'title': self.files[index]['name'], 'artist': 'Local File'}
+            self._meta_path = self.files[index].get('abs_path') or os.path.abspath(path)
+            self.metadata = self._meta_cache.get(self._meta_path) or {'title': self.files[index]['name'], 'artist': 'Local File'}
             self._start_mpv(path)
+            # A .lrc shipped with the track beats any network lookup
+            local = read_local_lrc(self._meta_path)
+            if local:
+                self.lyrics = local
+                self.current_song_lyrics_fetched = True
 
     def play_stream(self, result):
-        self.cleanup()
+        self._next_track()
         self.playing_index = -1
+        self._meta_path = None
         self.metadata = {'title': result['title'], 'artist': result['artist']}
-        self.current_song_lyrics_fetched = False
-        target = result.get('url') or result['id']
-        if len(target) == 11 and '.' not in target:
-             target = f"https://www.youtube.com/watch?v={target}"
-        self._start_mpv(target)
-        if self.show_lyrics:
-            threading.Thread(target=self.fetch_lyrics, args=(result['artist'], result['title']), daemon=True).start()
+        self._start_mpv(stream_target(result))
 
     def play_queue_item(self, item):
-        self.cleanup()
+        self._next_track()
         self.playing_index = -1
+        self._meta_path = None
         self.metadata = {'title': item.get('title', item.get('name', 'Unknown')), 
                          'artist': item.get('artist', 'Unknown')}
-        self.current_song_lyrics_fetched = False
         
-        target = ""
-        if item['type'] == 'file':
-            target = item['path']
-        else:
-            target = item.get('url') or item['id']
-            if len(target) == 11 and '.' not in target:
-                 target = f"https://www.youtube.com/watch?v={target}"
-                 
+        target = item['path'] if item['type'] == 'file' else stream_target(item)
         self._start_mpv(target)
-        if self.show_lyrics and item['type'] != 'file':
-            threading.Thread(target=self.fetch_lyrics, args=(self.metadata['artist'], self.metadata['title']), daemon=True).start()
 
     def _start_mpv(self, target):
         self.paused = False
         self.view_mode = 'player'
-        self.position = 0
+        self._buffering = False
+        self._reset_position()
         self.duration = 0
-        cmd = [
-            self.mpv_bin,
-            '--no-video',
-            self.ipc.get_mpv_flag(),
-            f'--volume={self.volume}',
-            '--idle',
-            target
-        ]
-        self.mpv_process = subprocess.Popen(
-            cmd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
-        )
+        # Lyrics for the new track are fetched by ipc_loop once mpv is up
+        self.lyrics = None
+        self.current_song_lyrics_fetched = False
+        self._lyrics_key = None
+        self._mpv_exec.submit(self._spawn_mpv, target, self._mpv_gen, self._meta_path)
+
+    def _spawn_mpv(self, target, gen, meta_path=None):
+        with self._mpv_lock:
+            # A later track change or stop superseded this start while it was queued
+            if gen != self._mpv_gen or not self.running: return
+            self._stop_mpv()
+            cmd = [
+                self.mpv_bin,
+                '--no-video',
+                # One audio-only format: no video+audio merge for mpv's yt-dlp hook to resolve
+                '--ytdl-format=bestaudio/best',
+                self.ipc.get_mpv_flag(),
+                f'--volume={self.volume}',
+                '--idle',
+                target
+            ]
+            try:
+                # Own session: terminal SIGINT reaches us only, so cleanup() can quit mpv gracefully
+                self.mpv_process = subprocess.Popen(
+                    cmd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                    close_fds=True, start_new_session=True
+                )
+                self._mpv_owner = (self.mpv_process, gen, meta_path)
+                self._reset_position()
+                self._mpv_started.set()
+            except Exception as e:
+                # Runs on _mpv_exec, where an uncaught error would vanish with its future
+                # (e.g. TypeError when no mpv binary was resolved)
+                self.message = f" Error starting mpv: {e} "
+                self.message_time = time.time()
+        self._mark_dirty()
+
+    def _queued_stop(self, gen):
+        with self._mpv_lock:
+            if gen == self._mpv_gen: self._stop_mpv()
 
     def stop_music(self):
-        self.cleanup()
+        gen = self._next_track()
+        self._mpv_exec.submit(self._queued_stop, gen)
         self.playing_index = -1
         self.paused = False
         self.view_mode = 'browser'
@@ -367,21 +543,24 @@ class MusicPlayer:
              self.stop_music()
 
     def toggle_pause(self):
-        self.ipc.send_command(["cycle", "pause"])
+        self.ipc.send_raw(MpvIpcClient.CMD_PAUSE)
 
     def change_volume(self, delta):
         self.volume = max(0, min(200, self.volume + delta))
-        self.ipc.send_command(["set_property", "volume", self.volume])
+        self.ipc.send_raw(MpvIpcClient.CMD_SET_VOLUME % self.volume)
 
     def draw_player_view(self):
-        height, width = self.stdscr.getmaxyx()
+        height, width = self._screen_size
         if height < 15 or width < 40:
             try: self.stdscr.addstr(0, 0, "Terminal too small")
             except: pass
             return
 
-        title = self.metadata.get('title', "Unknown")
-        artist = self.metadata.get('artist', "Unknown")
+        meta = self.metadata
+        # Read the interpolated clock once so the bar, the time and the lyric line agree
+        pos = self.position
+        title = meta.get('title', "Unknown")
+        artist = meta.get('artist', "Unknown")
         center_y = height // 2
         
         # 1. Current Track
@@ -396,7 +575,7 @@ class MusicPlayer:
         status = ("PAUSED" if self.paused else "PLAYING") + (" [Shuffle]" if self.shuffle else "")
         try:
             self.stdscr.addstr(center_y - 2, (width - len(status)) // 2, status, 
-                           curses.color_pair(3) if self.paused else curses.color_pair(2))
+                           self._pairs[3] if self.paused else self._pairs[2])
         except: pass
 
         # 3. Cthulhu or Lyrics
@@ -404,23 +583,19 @@ class MusicPlayer:
             lyrics_height = 10
             start_y = center_y - 2
             if self.lyrics:
-                is_synced = any(l['time'] is not None for l in self.lyrics)
+                is_synced = self._lyrics_synced
                 current_line_idx = 0
                 if is_synced:
-                    found_idx = -1
-                    for i, line in enumerate(self.lyrics):
-                         if line['time'] is not None and line['time'] <= self.position: found_idx = i
-                         else: break
-                    if found_idx != -1: current_line_idx = found_idx
+                    current_line_idx = max(0, bisect.bisect_right(self._lyric_times, pos) - 1)
                     target_offset = current_line_idx - (lyrics_height // 2)
                     self.lyrics_scroll_offset = max(0, min(len(self.lyrics) - 1, target_offset))
                 for i in range(lyrics_height):
                     line_idx = self.lyrics_scroll_offset + i
                     if 0 <= line_idx < len(self.lyrics):
                         line_text = self.lyrics[line_idx]['text'].strip()
-                        style = curses.color_pair(6)
+                        style = self._pairs[6]
                         if is_synced and line_idx == current_line_idx:
-                            style = curses.color_pair(2) | curses.A_BOLD
+                            style = self._pairs[2] | curses.A_BOLD
                             line_text = ">> " + line_text
                         try: self.stdscr.addstr(start_y + i, max(0, (width - len(line_text)) // 2), line_text[:width], style)
                         except: pass
@@ -429,19 +604,17 @@ class MusicPlayer:
                  try: self.stdscr.addstr(center_y, (width - len(msg)) // 2, msg, curses.A_DIM)
                  except: pass
         else:
-            if time.time() - self.last_anim_time > 0.4:
-                self.anim_frame = (self.anim_frame + 1) % 2
-                self.last_anim_time = time.time()
+            self.anim_frame = int(time.monotonic() / ANIM_INTERVAL) % 2
             cthulhu_frames = [
                 [" ( o . o ) ", " (  |||  ) ", "/||\\/||\\/||\\"],
                 [" ( O . O ) ", " ( /|||\\ ) ", "//||\\/||\\/||\\\\"]
             ]
             art = cthulhu_frames[self.anim_frame] if not self.paused else [" ( - . - ) ", " (  zzz  ) ", "  |||||||  "]
             for i, line in enumerate(art):
-                try: self.stdscr.addstr(center_y + i, (width - len(line)) // 2, line, curses.color_pair(7) | (curses.A_BOLD if not self.paused else curses.A_DIM))
+                try: self.stdscr.addstr(center_y + i, (width - len(line)) // 2, line, self._pairs[7] | (curses.A_BOLD if not self.paused else curses.A_DIM))
                 except: pass
 
-        self.draw_progress_bar(center_y + 4, width - 4)
+        self.draw_progress_bar(center_y + 4, width - 4, pos)
         vol_str = f"Volume: {int(self.volume)}%"
         try: self.stdscr.addstr(center_y + 6, (width - len(vol_str)) // 2, vol_str)
         except: pass
@@ -459,98 +632,155 @@ class MusicPlayer:
                      item = self.queue[i]
                      name = item.get('title', item.get('name', 'Unknown'))
                      display = f"{i+1}. {name}"
-                     self.stdscr.addstr(queue_y + 1 + i, max(0, (width - len(display)) // 2), display[:width], curses.color_pair(6))
+                     self.stdscr.addstr(queue_y + 1 + i, max(0, (width - len(display)) // 2), display[:width], self._pairs[6])
              except Exception as e:
                  with open("error_log.txt", "a") as f: f.write(str(e) + "\n")
 
         hint = "[n] Next  [p] Prev  [Space] Pause  [z] Shuffle  [l] Lyrics  [/] Search  [b] Library  [q] Quit"
-        try: self.stdscr.addstr(height - 2, max(0, (width - len(hint)) // 2), hint[:width], curses.color_pair(1))
+        try: self.stdscr.addstr(height - 2, max(0, (width - len(hint)) // 2), hint[:width], self._pairs[1])
         except: pass
 
-    def draw_progress_bar(self, y, width):
+    def draw_progress_bar(self, y, width, pos=None):
+        if pos is None: pos = self.position
         if self.duration <= 0: pct = 0
-        else: pct = min(1.0, self.position / self.duration)
-        bar_width = width - 20
+        else: pct = min(1.0, pos / self.duration)
+        bar_width = max(0, min(width - 20, _BAR_MAX))
         fill_width = int(bar_width * pct)
-        bar = "[" + "=" * fill_width + "-" * (bar_width - fill_width) + "]"
-        time_str = f"{format_time(self.position)} / {format_time(self.duration)}"
-        try: self.stdscr.addstr(y, 2, f"{bar} {time_str}", curses.color_pair(5))
+        bar = "[" + _BAR_FILL[:fill_width] + _BAR_EMPTY[:bar_width - fill_width] + "]"
+        time_str = f"{format_time(pos)} / {format_time(self.duration)}"
+        try: self.stdscr.addstr(y, 2, f"{bar} {time_str}", self._pairs[5])
+        except: pass
+
+    def _ensure_windows(self):
+        # List pad and status window used by the list views; dropped on KEY_RESIZE
+        if self._list_pad is None:
+            height, width = self._screen_size
+            self._list_pad = curses.newpad(max(_PAD_ROWS, height - 2), width)
+            self._status_win = curses.newwin(1, width, height - 1, 0)
+            self._list_pad.leaveok(True)
+            self._status_win.leaveok(True)
+            self._list_sig = None
+
+    def _paint_pad_row(self, idx, width):
+        item = self._pad_items[idx]
+        style = curses.A_NORMAL
+        if idx == self.selected_index:
+            style = self._pairs[1]
+        elif self.is_in_queue(item, self._pad_queued):
+            style = self._pairs[2] # Green for queued
+        # Row text is kept off the item: search results are shared with the searcher's cache
+        text = self._pad_text.get(idx)
+        if text is None:
+            text = self._pad_text[idx] = "  " + self._pad_label(item)
+        try: self._list_pad.addnstr(idx - self._pad_base, 0, text, width, style)
+        except: pass
+
+    def _sync_list_pad(self, sig, items, label, rows, width):
+        # Rows are painted into the pad only when the listing changes; scrolling
+        # just moves the pad viewport and a selection move repaints two rows
+        offset = self.scroll_offset
+        in_pad = self._pad_base <= offset and offset + rows <= self._pad_base + _PAD_ROWS
+        if sig != self._list_sig or not in_pad:
+            self._list_sig = sig
+            self._pad_base = max(0, offset - max(0, _PAD_ROWS - rows) // 2)
+            if items is not self._pad_items or label is not self._pad_label:
+                self._pad_text = {}
+            self._pad_items = items
+            self._pad_label = label
+            self._pad_queued = self.queue_keys()
+            self._list_pad.erase()
+            for idx in range(self._pad_base, min(len(items), self._pad_base + _PAD_ROWS)):
+                self._paint_pad_row(idx, width)
+        elif self._pad_sel != self.selected_index:
+            for idx in (self._pad_sel, self.selected_index):
+                if self._pad_base <= idx < min(len(items), self._pad_base + _PAD_ROWS):
+                    self._paint_pad_row(idx, width)
+        self._pad_sel = self.selected_index
+
+    def _flush_windows(self):
+        # Stage stdscr first so the pad viewport ends up on top in the virtual screen
+        height, width = self._screen_size
+        self.stdscr.noutrefresh()
+        # Pad lines are copied only if touched: after a clear, or when the viewport moved
+        pad_row = self.scroll_offset - self._pad_base
+        if self._screen_cleared or pad_row != self._pad_row:
+            self._list_pad.touchwin()
+        self._pad_row = pad_row
+        try: self._list_pad.noutrefresh(pad_row, 0, 1, 0, max(1, height - 2), width - 1)
         except: pass
+        self._status_win.noutrefresh()
 
     def draw_browser(self):
-        height, width = self.stdscr.getmaxyx()
+        height, width = self._screen_size
+        self._ensure_windows()
         try:
-            self.stdscr.attron(curses.color_pair(1))
+            self.stdscr.attron(self._pairs[1])
             self.stdscr.addstr(0, 0, f" Browser: {self.current_dir} ".ljust(width))
-            self.stdscr.attroff(curses.color_pair(1))
+            self.stdscr.attroff(self._pairs[1])
         except: pass
-        for i in range(height - 2):
-            file_idx = i + self.scroll_offset
-            if file_idx >= len(self.files): break
-            
-            item = self.files[file_idx]
-            is_selected = (file_idx == self.selected_index)
-            is_queued = self.is_in_queue(item)
-            
-            style = curses.A_NORMAL
-            if is_selected:
-                style = curses.color_pair(1)
-            elif is_queued:
-                style = curses.color_pair(2) # Green for queued
-
-            try: self.stdscr.addstr(i + 1, 0, f"  {item['name']}"[:width], style)
-            except: pass
+        sig = ('browser', self.current_dir, id(self.files), len(self.files), len(self.queue))
+        self._sync_list_pad(sig, self.files, _browser_label, height - 2, width)
         help_txt = "[R]ecursive | [/] Search | [D]efault Dir | [z]Shuffle | [a] Queue | [m] Player"
-        try: self.stdscr.addstr(height-1, 0, help_txt[:width], curses.color_pair(6))
+        self._status_win.erase()
+        try: self._status_win.addstr(0, 0, help_txt[:width], self._pairs[6])
         except: pass
         if time.time() - self.message_time < 2 and self.message:
-            try: self.stdscr.addstr(0, width - len(self.message) - 2, self.message, curses.color_pair(2) | curses.A_BOLD)
+            try: self.stdscr.addstr(0, width - len(self.message) - 2, self.message, self._pairs[2] | curses.A_BOLD)
             except: pass
+        self._flush_windows()
 
     def draw_search_results(self):
-        height, width = self.stdscr.getmaxyx()
+        height, width = self._screen_size
+        self._ensure_windows()
         try:
-            self.stdscr.attron(curses.color_pair(1))
-            self.stdscr.addstr(0, 0, f" Search Results ".ljust(width))
-            self.stdscr.attroff(curses.color_pair(1))
+            self.stdscr.attron(self._pairs[1])
+            header = f" Searching: {self._search_pending}... " if self._search_pending else " Search Results "
+            self.stdscr.addstr(0, 0, header.ljust(width))
+            self.stdscr.attroff(self._pairs[1])
         except: pass
-        for i in range(height - 2):
-            idx = i + self.scroll_offset
-            if idx >= len(self.search_results): break
-            
-            item = self.search_results[idx]
-            is_selected = (idx == self.selected_index)
-            is_queued = self.is_in_queue(item)
-            
-            style = curses.A_NORMAL
-            if is_selected:
-                style = curses.color_pair(1)
-            elif is_queued:
-                style = curses.color_pair(2) # Green
-
-            name = f"{item['title']} - {item['artist']}"
-            try: self.stdscr.addstr(i+1, 0, f"  {name}"[:width], style)
-            except: pass
+        sig = ('search', id(self.search_results), len(self.search_results), len(self.queue))
+        self._sync_list_pad(sig, self.search_results, _search_label, height - 2, width)
         
         hint = "[Enter] Play | [a] Add One | [A] Add All | [q] Back | [m] Player"
-        try: self.stdscr.addstr(height-1, 0, hint[:width], curses.color_pair(6))
+        self._status_win.erase()
+        try: self._status_win.addstr(0, 0, hint[:width], self._pairs[6])
         except: pass
+        self._flush_windows()
 
     def handle_input(self, key):
         if key == 10:
-            query = "".join(self.search_query)
+            query = self.search_query
             if query:
                 self.is_searching_input = False
                 self.view_mode = 'search_results'
                 source = 'soundcloud' if query.startswith('sc:') else 'youtube'
                 if source == 'soundcloud': query = query[3:]
-                self.search_results = self.searcher.search(query, source)
+                # yt-dlp takes seconds; keep the UI responsive while it runs
+                self._search_gen = gen = next(self._search_gens)
+                self._search_pending = query
+                self.search_results = []
                 self.selected_index = 0
                 self.scroll_offset = 0
+                threading.Thread(target=self._search_worker, args=(query, source, gen), daemon=True).start()
         elif key == 27: self.is_searching_input = False
         elif key in (127, curses.KEY_BACKSPACE, 8): 
-            if self.search_query: self.search_query.pop()
-        elif 32 <= key <= 126: self.search_query.append(chr(key))
+            self.search_query = self.search_query[:-1]
+        elif 32 <= key <= 126: self.search_query += chr(key)
+
+    def _search_worker(self, query, source, gen):
+        results = self.searcher.search(query, source)
+        if gen != self._search_gen: return # A newer search was started
+        self._search_pending = None
+        self.search_results = results
+        # The selection is shared with the browser; leave it alone if the user went there
+        if self.view_mode == 'search_results':
+            self.selected_index = 0
+            self.scroll_offset = 0
+        self._mark_dirty()
+
+    def _move_selection(self, delta):
+        limit = len(self.files) if self.view_mode == 'browser' else len(self.search_results)
+        self.selected_index = max(0, min(limit - 1, self.selected_index + delta))
 
     def process_key(self, key):
         if key == ord('q'): 
@@ -567,21 +797,21 @@ class MusicPlayer:
                 self.message_time = time.time()
         elif key == ord('/'): 
             self.is_searching_input = True
-            self.search_query = []
+            self.search_query = ""
         elif key == 10:
             if self.view_mode == 'browser':
                 f = self.files[self.selected_index]
                 if f['type'] == 'dir':
-                    self.current_dir = os.path.abspath(os.path.join(self.current_dir, f['path']))
+                    # Entries carry their absolute path from the scan; no join/normalize per Enter
+                    self.current_dir = f.get('abs_path') or os.path.abspath(os.path.join(self.current_dir, f['path']))
                     self.scan_directory()
                 else: self.play_file(self.selected_index)
             elif self.view_mode == 'search_results':
                 if self.search_results: self.play_stream(self.search_results[self.selected_index])
         elif key == curses.KEY_DOWN:
-            limit = len(self.files) if self.view_mode == 'browser' else len(self.search_results)
-            self.selected_index = min(limit - 1, self.selected_index + 1)
+            self._move_selection(1)
         elif key == curses.KEY_UP:
-            self.selected_index = max(0, self.selected_index - 1)
+            self._move_selection(-1)
         elif key == ord('a'):
             if self.view_mode == 'search_results' and self.search_results:
                 item = self.search_results[self.selected_index]
@@ -591,7 +821,7 @@ class MusicPlayer:
             elif self.view_mode == 'browser' and self.files:
                 f = self.files[self.selected_index]
                 if f['type'] == 'file':
-                    abs_path = os.path.abspath(os.path.join(self.current_dir, f['path']))
+                    abs_path = f.get('abs_path') or os.path.abspath(os.path.join(self.current_dir, f['path']))
                     item = {'type': 'file', 'path': abs_path, 'name': f['name'], 'artist': 'Local File'}
                     self.queue.append(item)
                     self.message = f" Added to queue: {f['name'][:20]}... "
@@ -605,33 +835,168 @@ class MusicPlayer:
                  if not self.mpv_process:
                      self.handle_end_of_file()
         elif key == ord(' '): self.toggle_pause()
-        elif key == ord('l'): self.show_lyrics = not self.show_lyrics
+        elif key == ord('l'):
+            self.show_lyrics = not self.show_lyrics
+            # Events may be quiet (e.g. while paused), so don't wait for one to start the fetch
+            self.maybe_fetch_lyrics()
         elif key == ord('n'): self.handle_end_of_file()
         elif key == ord('p'):
-            if self.playback_history:
-                idx = self.playback_history.pop()
-                self.play_file(idx, push_history=False)
+            self.play_previous()
+
+    def _mark_dirty(self):
+        # Called from worker threads: flag a redraw and wake run() if it is waiting
+        self._dirty = True
+        if self._wake_w is not None:
+            try: os.write(self._wake_w, _WAKE_TOKEN)
+            except OSError: pass # Pipe full, a wakeup is already pending
+
+    def _setup_input(self):
+        if sys.platform == 'win32':
+            return # select() cannot wait on a console; getch keeps its 100 ms timeout
+        selector = selectors.DefaultSelector()
+        try:
+            selector.register(sys.stdin.fileno(), selectors.EVENT_READ)
+        except (OSError, ValueError):
+            selector.close()
+            return # stdin is not pollable; fall back to the getch timeout
+        if hasattr(os, 'eventfd'):
+            # Linux: a single eventfd counter serves as both ends of the wakeup channel
+            self._wake_r = self._wake_w = os.eventfd(0, os.EFD_NONBLOCK | os.EFD_CLOEXEC)
+        else:
+            self._wake_r, self._wake_w = os.pipe()
+            os.set_blocking(self._wake_r, False)
+            os.set_blocking(self._wake_w, False)
+        selector.register(self._wake_r, selectors.EVENT_READ)
+        self._selector = selector
+        self.stdscr.nodelay(1)
+
+    def _teardown_input(self):
+        if self._selector is None: return
+        self._selector.close()
+        os.close(self._wake_r)
+        if self._wake_w != self._wake_r: os.close(self._wake_w)
+        self._selector = self._wake_r = self._wake_w = None
+
+    def _read_keys(self, timeout):
+        if self._selector is None:
+            # No wakeup channel: block in getch, but no longer than 100 ms (other threads' updates)
+            # and never past the next due redraw
+            self.stdscr.timeout(100 if timeout is None else max(0, min(100, int(timeout * 1000))))
+            try: key = self.stdscr.getch()
+            except: return []
+            return [] if key == -1 else [key]
+        # Sleep until a keystroke, a wakeup from another thread, or the next redraw is due
+        for key, _ in self._selector.select(None if timeout is None else max(0, timeout)):
+            if key.fd == self._wake_r:
+                try: os.read(self._wake_r, 4096)
+                except OSError: pass
+        # Always drain: curses may hold buffered input or a pending KEY_RESIZE
+        keys = []
+        while True:
+            try: key = self.stdscr.getch()
+            except: break
+            if key == -1: break
+            keys.append(key)
+        return keys
 
     def run(self):
+        self._setup_input()
+        try:
+            self._run_loop()
+        finally:
+            self._teardown_input()
+            # Not left to atexit: that only runs after the lyric workers have been joined
+            self.cleanup()
+
+    def _clock_state(self):
+        # What the passing of time alone changes on the player view; a tick repaints only if this moved
+        pos = self.position
+        if self.show_lyrics:
+            frame = None
+            line = bisect.bisect_right(self._lyric_times, pos) if self._lyrics_synced else None
+        else:
+            frame = None if self.paused else int(time.monotonic() / ANIM_INTERVAL) % 2
+            line = None
+        return int(pos), frame, line
+
+    def _set_caret(self, visible):
+        # Show the cursor (and let curses place it) only while a query is typed
+        if visible == self._caret: return
+        self._caret = visible
+        self.stdscr.leaveok(not visible)
+        try: curses.curs_set(1 if visible else 0)
+        except: pass
+
+    def _redraw_timeout(self):
+        # Seconds until time-driven content must be checked, or None if only events matter
+        if self.view_mode == 'player':
+            return self._last_tick + REDRAW_INTERVAL - time.monotonic()
+        remaining = 2 - (time.time() - self.message_time)
+        if self.message and remaining > 0:
+            return remaining # Repaint once the status message expires
+        return None
+
+    def _run_loop(self):
         while self.running:
-            self.stdscr.clear()
-            if self.view_mode == 'player': self.draw_player_view()
-            elif self.view_mode == 'search_results': self.draw_search_results()
-            else: self.draw_browser()
-            if self.is_searching_input:
-                try: self.stdscr.addstr(0,0, "Search: " + "".join(self.search_query), curses.A_REVERSE)
-                except: pass
-            self.stdscr.refresh()
-            try: key = self.stdscr.getch()
-            except: continue
-            if key == -1: continue
-            if self.is_searching_input:
-                self.handle_input(key)
-                continue
-            self.process_key(key)
+            now = time.monotonic()
+            if self._dirty:
+                cleared = self.view_mode == 'player' or self.view_mode != self._drawn_view
+                if cleared: self.stdscr.erase()
+                self._drawn_view = self.view_mode
+                self._screen_cleared = cleared
+                if self.view_mode == 'player':
+                    self._drawn_clock = self._clock_state()
+                    self.draw_player_view()
+                elif self.view_mode == 'search_results': self.draw_search_results()
+                else: self.draw_browser()
+                if self.is_searching_input:
+                    prompt = "Search: " + self.search_query
+                    try: self.stdscr.addstr(0,0, prompt, curses.A_REVERSE)
+                    except: pass
+                    try: self.stdscr.move(0, min(len(prompt), self._screen_size[1] - 1))
+                    except: pass
+                self._set_caret(self.is_searching_input)
+                self.stdscr.noutrefresh()
+                curses.doupdate()
+                self._dirty = False
+                self._last_tick = now
+            timeout = self._redraw_timeout()
+            deadline = None if timeout is None else time.monotonic() + timeout
+            keys = self._read_keys(RESIZE_POLL if timeout is None else min(timeout, RESIZE_POLL))
+            if deadline is not None and time.monotonic() >= deadline:
+                self._last_tick = time.monotonic()
+                if self.view_mode != 'player' or self._clock_state() != self._drawn_clock:
+                    self._dirty = True
+            # A held arrow key arrives as a burst: apply its net movement once
+            delta = 0
+            for key in keys:
+                # Any input (including KEY_RESIZE) may change what is on screen
+                self._dirty = True
+                if not self.is_searching_input and key in (curses.KEY_DOWN, curses.KEY_UP):
+                    delta += 1 if key == curses.KEY_DOWN else -1
+                    continue
+                if delta:
+                    self._move_selection(delta)
+                    delta = 0
+                if key == curses.KEY_RESIZE:
+                    self._screen_size = self.stdscr.getmaxyx()
+                    self._list_pad = None
+                    self._drawn_view = None
+                elif self.is_searching_input:
+                    self.handle_input(key)
+                else:
+                    self.process_key(key)
+                if not self.running: break
+            if delta: self._move_selection(delta)
 
 def main(debug=False):
-    curses.wrapper(lambda s: MusicPlayer(s, debug=debug).run())
+    # Resolve MPV up front so download progress and errors print to a normal terminal
+    mpv_bin = get_mpv_path() or download_mpv()
+    if not mpv_bin:
+        print("Error: MPV player not found.")
+        print("Please install 'mpv' via your package manager (e.g., sudo pacman -S mpv) or add it to PATH.")
+        sys.exit(1)
+    curses.wrapper(lambda s: MusicPlayer(s, debug=debug, mpv_bin=mpv_bin).run())
 
 if __name__ == "__main__":
     main()
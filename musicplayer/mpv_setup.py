@@ -6,11 +6,20 @@ import urllib.request
 import tempfile
 import json
 
+# First mpv found, so later lookups skip the PATH walk
+_mpv_path = None
+
 def get_mpv_path():
+    global _mpv_path
+    if _mpv_path is not None:
+        return _mpv_path
+
     # 1. Check global PATH
     mpv_cmd = shutil.which("mpv")
     if mpv_cmd:
-        return mpv_cmd
+        # Absolute path lets subprocess use the posix_spawn fast path
+        _mpv_path = os.path.abspath(mpv_cmd)
+        return _mpv_path
 
     # 2. Check local user data path
     if platform.system() == "Windows":
@@ -19,6 +28,7 @@ def get_mpv_path():
         local_bin = os.path.join(os.path.expanduser("~"), ".local", "share", "cli-music-player", "bin", "mpv")
 
     if os.path.exists(local_bin):
+        _mpv_path = local_bin
         return local_bin
 
     return None
@@ -28,7 +38,7 @@ def get_latest_mpv_url():
         api_url = "https://api.github.com/repos/shinchiro/mpv-winbuild-cmake/releases/latest"
         req = urllib.request.Request(api_url, headers={'User-Agent': 'Mozilla/5.0'})
         with urllib.request.urlopen(req, timeout=10) as response:
-            data = json.loads(response.read().decode())
+            data = json.load(response)
             for asset in data.get('assets', []):
                 # Prefer v3 x86_64 build
                 if 'mpv-x86_64-v3' in asset['name'] and asset['name'].endswith('.7z'):
@@ -46,6 +56,7 @@ def download_mpv():
     Downloads MPV static build for the current platform.
     Uses 7z for Windows and extracts using py7zr.
     """
+    global _mpv_path
     system = platform.system()
     if system != "Windows":
         return None
@@ -92,6 +103,7 @@ def download_mpv():
         
         if os.path.exists(expected_exe):
             print("MPV setup complete.")
+            _mpv_path = expected_exe
             return expected_exe
         else:
             print("Could not find mpv.exe after extraction.")
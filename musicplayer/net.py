@@ -0,0 +1,137 @@
+import json
+import http.client
+import threading
+import time
+import urllib.parse
+import urllib.error
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def loads_json(body):
+    """Decode a JSON response body (bytes); orjson is used when installed"""
+    if orjson is not None:
+        return orjson.loads(body)
+    return json.loads(body) # json detects UTF-8 in bytes itself
+
+# Errors that mean the connection was dropped: stale keep-alive or a reset mid-request
+_STALE_ERRORS = (http.client.RemoteDisconnected, http.client.BadStatusLine, ConnectionError)
+
+def _split_timeout(timeout):
+    """Accept a single timeout or a (connect, read) pair"""
+    if isinstance(timeout, tuple):
+        return timeout
+    return timeout, timeout
+
+class HttpSession:
+    """
+    Minimal keep-alive HTTP client: idle connections are pooled per host so
+    repeated requests skip the TCP/TLS handshake. Safe to share between threads.
+    """
+    MAX_REDIRECTS = 5
+    MAX_IDLE_PER_HOST = 4
+    RETRY_BACKOFF = 0.2
+    # After a failed connect the host is reported down for this long instead of timing out again
+    UNREACHABLE_TTL = 60
+
+    def __init__(self, headers=None, timeout=(3, 7)):
+        self.headers = dict(headers or {})
+        # Short connect timeout so an unreachable host fails fast; reads get longer
+        self.timeout = timeout
+        self._idle = {}
+        self._down_until = {}
+        self._lock = threading.Lock()
+
+    def get(self, url, headers=None, timeout=None):
+        """GET url and return the body bytes; raises urllib.error.HTTPError on 4xx/5xx"""
+        if timeout is None: timeout = self.timeout
+        for _ in range(self.MAX_REDIRECTS + 1):
+            status, reason, resp_headers, body = self._request(url, headers, timeout)
+            location = resp_headers.get('Location')
+            if status in (301, 302, 303, 307, 308) and location:
+                url = urllib.parse.urljoin(url, location)
+                continue
+            if status >= 400:
+                raise urllib.error.HTTPError(url, status, reason, resp_headers, None)
+            return body
+        raise urllib.error.HTTPError(url, status, "Too many redirects", resp_headers, None)
+
+    def _request(self, url, headers, timeout):
+        parts = urllib.parse.urlsplit(url)
+        key = (parts.scheme, parts.netloc)
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+        request_headers = dict(self.headers)
+        request_headers.update(headers or {})
+
+        conn, reused = self._acquire(key, timeout)
+        for attempt in range(2):
+            try:
+                conn.request('GET', path, headers=request_headers)
+                resp = conn.getresponse()
+                body = resp.read()
+                break
+            except _STALE_ERRORS:
+                conn.close()
+                if attempt: raise
+                # Retry once on a fresh connection: immediately if the pooled one
+                # went stale, after a short backoff if a new one was dropped
+                if not reused: time.sleep(self.RETRY_BACKOFF)
+                conn, reused = self._connect(key, timeout), False
+            except:
+                conn.close()
+                raise
+
+        if resp.will_close:
+            conn.close()
+        else:
+            self._release(key, conn)
+        return resp.status, resp.reason, resp.headers, body
+
+    def _connect(self, key, timeout):
+        scheme, netloc = key
+        connect_timeout, read_timeout = _split_timeout(timeout)
+        # Offline (or the host is down): fail at once until the backoff runs out
+        if time.monotonic() < self._down_until.get(key, 0):
+            raise ConnectionError(f"{netloc} unreachable")
+        if scheme == 'https':
+            conn = http.client.HTTPSConnection(netloc, timeout=connect_timeout)
+        else:
+            conn = http.client.HTTPConnection(netloc, timeout=connect_timeout)
+        try:
+            conn.connect()
+        except OSError:
+            conn.close()
+            self._down_until[key] = time.monotonic() + self.UNREACHABLE_TTL
+            raise
+        self._down_until.pop(key, None)
+        conn.sock.settimeout(read_timeout)
+        return conn
+
+    def _acquire(self, key, timeout):
+        with self._lock:
+            pool = self._idle.get(key)
+            conn = pool.pop() if pool else None
+        if conn is None:
+            return self._connect(key, timeout), False
+        if conn.sock is not None:
+            conn.sock.settimeout(_split_timeout(timeout)[1])
+        return conn, True
+
+    def _release(self, key, conn):
+        with self._lock:
+            pool = self._idle.setdefault(key, [])
+            if len(pool) < self.MAX_IDLE_PER_HOST:
+                pool.append(conn)
+                return
+        conn.close()
+
+    def close(self):
+        with self._lock:
+            pools, self._idle = self._idle, {}
+        for pool in pools.values():
+            for conn in pool:
+                conn.close()
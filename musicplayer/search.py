@@ -1,6 +1,16 @@
-import yt_dlp
+import time
+import threading
+import collections
+from .search_cache import load_results, save_results
 
 class OnlineSearcher:
+    # Recent searches answered from memory; URL lookups expire sooner (they may carry stream URLs)
+    CACHE_SIZE = 128
+    CACHE_TTL = 600
+    URL_CACHE_TTL = 60
+    # Only searches slower than this go to disk; quick ones aren't worth the space
+    PERSIST_MIN_SECONDS = 0.2
+
     def __init__(self):
         self.ydl_opts = {
             'quiet': True,
@@ -8,7 +18,15 @@ class OnlineSearcher:
             'extract_flat': 'in_playlist',
             'skip_download': True,
             'no_warnings': True,
+            # A stalled connection fails the search instead of hanging it for yt-dlp's default 20s
+            'socket_timeout': 10,
         }
+        # One YoutubeDL for every search: its setup (extractor registry, cookies) is paid once.
+        # Built on first use, and the lock keeps concurrent searches off it (it isn't thread-safe)
+        self._ydl = None
+        self._ydl_lock = threading.Lock()
+        self._cache = collections.OrderedDict() # (query, source) -> (time, results)
+        self._cache_lock = threading.Lock()
 
     def search(self, query, source='youtube'):
         """
@@ -16,43 +34,87 @@ class OnlineSearcher:
         source: 'youtube' or 'soundcloud'
         Returns: List of dicts {'title', 'artist', 'duration', 'id', 'source'}
         """
-        is_url = query.startswith('http') or query.startswith('www')
+        # Full scheme/host prefixes, so a search like "httpie" stays a text search
+        is_url = query.startswith(('http://', 'https://', 'www.'))
+        # Case and stray spaces don't change what the site returns; URLs are case-sensitive
+        key = (query if is_url else query.strip().lower(), source)
+        ttl = self.URL_CACHE_TTL if is_url else self.CACHE_TTL
+        with self._cache_lock:
+            hit = self._cache.get(key)
+            if hit is not None and time.time() - hit[0] < ttl:
+                self._cache.move_to_end(key)
+                return list(hit[1])
+
+        # Text searches survive restarts on disk; URL lookups may hold expiring stream URLs
+        if not is_url:
+            results = load_results(key[0], source)
+            if results:
+                self._remember(key, results)
+                return list(results)
+
         if is_url:
             search_query = query
         else:
             prefix = "ytsearch20:" if source == 'youtube' else "scsearch20:"
             search_query = f"{prefix}{query}"
-        
+        started = time.perf_counter()
+        results = self._extract(search_query, source)
+        elapsed = time.perf_counter() - started
+        if results: # Failures come back empty and are not cached
+            self._remember(key, results)
+            if not is_url and elapsed >= self.PERSIST_MIN_SECONDS:
+                save_results(key[0], source, results)
+        return list(results)
+
+    def _remember(self, key, results):
+        with self._cache_lock:
+            self._cache[key] = (time.time(), results)
+            self._cache.move_to_end(key)
+            if len(self._cache) > self.CACHE_SIZE:
+                self._cache.popitem(last=False)
+
+    def close(self):
+        # Exit only, so don't wait on the lock: a search still running just fails
+        ydl, self._ydl = self._ydl, None
+        if ydl is not None:
+            try: ydl.close()
+            except: pass
+
+    def _extract(self, search_query, source):
         try:
-            with yt_dlp.YoutubeDL(self.ydl_opts) as ydl:
-                info = ydl.extract_info(search_query, download=False)
-                
-                results = []
-                # If it's a direct video URL, info might be the dict itself
-                if 'entries' not in info and 'title' in info:
+            with self._ydl_lock:
+                if self._ydl is None:
+                    # Imported on the first search: yt-dlp loads every extractor, which
+                    # would otherwise slow the player's startup (and every test import)
+                    import yt_dlp
+                    self._ydl = yt_dlp.YoutubeDL(self.ydl_opts)
+                info = self._ydl.extract_info(search_query, download=False)
+            results = []
+            # If it's a direct video URL, info might be the dict itself
+            if 'entries' not in info and 'title' in info:
+                results.append({
+                    'title': info.get('title', 'Unknown'),
+                    'artist': info.get('uploader', 'Unknown'),
+                    'duration': info.get('duration', 0),
+                    'id': info.get('id'),
+                    'url': info.get('url') or info.get('webpage_url'),
+                    'source': source,
+                    'type': 'stream'
+                })
+            elif 'entries' in info:
+                for entry in info['entries']:
+                    # Filter out None entries (happens sometimes with deleted videos in playlists)
+                    if not entry: continue
                     results.append({
-                        'title': info.get('title', 'Unknown'),
-                        'artist': info.get('uploader', 'Unknown'),
-                        'duration': info.get('duration', 0),
-                        'id': info.get('id'),
-                        'url': info.get('url') or info.get('webpage_url'),
+                        'title': entry.get('title', 'Unknown'),
+                        'artist': entry.get('uploader', 'Unknown'),
+                        'duration': entry.get('duration', 0),
+                        'id': entry.get('id'),
+                        'url': entry.get('url'), 
                         'source': source,
-                        'type': 'stream'
+                        'type': 'stream' 
                     })
-                elif 'entries' in info:
-                    for entry in info['entries']:
-                        # Filter out None entries (happens sometimes with deleted videos in playlists)
-                        if not entry: continue
-                        results.append({
-                            'title': entry.get('title', 'Unknown'),
-                            'artist': entry.get('uploader', 'Unknown'),
-                            'duration': entry.get('duration', 0),
-                            'id': entry.get('id'),
-                            'url': entry.get('url'), 
-                            'source': source,
-                            'type': 'stream' 
-                        })
-                return results
+            return results
         except Exception as e:
             # print(f"Search error: {e}")
             return []
@@ -0,0 +1,32 @@
+import os
+import json
+import time
+import hashlib
+
+from .config import get_cache_dir as _get_cache_dir, write_json_atomic
+
+# Results for a query drift slowly; a day-old list is still worth showing instantly
+TTL = 24 * 60 * 60
+
+def get_cache_dir():
+    """Get the OS-specific directory holding cached search results"""
+    return _get_cache_dir("search")
+
+def _cache_key(query, source):
+    return hashlib.sha1(f"{source}\x00{query}".encode('utf-8')).hexdigest()
+
+def load_results(query, source):
+    """Return cached results for an already normalized query, or None if missing or stale"""
+    path = os.path.join(get_cache_dir(), f"{_cache_key(query, source)}.json")
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            entry = json.load(f)
+    except:
+        return None
+    if time.time() - entry.get('ts', 0) > TTL:
+        return None
+    return entry.get('data')
+
+def save_results(query, source, results):
+    path = os.path.join(get_cache_dir(), f"{_cache_key(query, source)}.json")
+    return write_json_atomic(path, {'ts': time.time(), 'data': results})
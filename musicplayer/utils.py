@@ -1,29 +1,210 @@
+import os
 import unicodedata
 import re
+from html import unescape
+
+try:
+    import lxml.html
+    # Raw response bytes are handed straight to libxml2; the pages are UTF-8
+    _UTF8_HTML_PARSER = lxml.html.HTMLParser(encoding='utf-8')
+except ImportError:
+    lxml = None
+
+# Supported audio extensions
+AUDIO_EXTENSIONS = {'.mp3', '.wav', '.flac', '.ogg', '.m4a', '.wma', '.aac', '.opus'}
+
+_AUDIO_SUFFIXES = tuple(AUDIO_EXTENSIONS)
+
+def is_audio_file(name):
+    """Check the file name's extension against AUDIO_EXTENSIONS"""
+    return name.lower().endswith(_AUDIO_SUFFIXES)
+
+def scan_audio_dir(path, follow_links=True):
+    """List a directory once with scandir; returns sorted (dirs, audio files), hidden dirs skipped"""
+    dirs, files = [], []
+    with os.scandir(path) as it:
+        for entry in it:
+            # DirEntry caches the type from readdir, so only symlinks cost a stat here
+            if entry.is_dir(follow_symlinks=follow_links):
+                if not entry.name.startswith('.'):
+                    dirs.append(entry.name)
+            elif is_audio_file(entry.name) and entry.is_file():
+                files.append(entry.name)
+    dirs.sort()
+    files.sort()
+    return dirs, files
+
+def walk_audio_files(top):
+    """Yield audio file paths relative to top, depth-first in sorted order"""
+    stack = [('', top)]
+    while stack:
+        rel, path = stack.pop()
+        # Like os.walk, don't descend into symlinked directories
+        try: dirs, files = scan_audio_dir(path, follow_links=False)
+        except OSError: continue
+        for name in files:
+            yield rel + name
+        # Push in reverse so subdirectories are visited alphabetically
+        for name in reversed(dirs):
+            stack.append((rel + name + os.sep, os.path.join(path, name)))
+
+# Folders next to the tracks that may hold their .lrc files (matched case-insensitively)
+_LYRICS_SUBDIRS = ('lyrics', '.lrc')
+# Directory -> (mtime, {lowercased stem: .lrc path}), so each folder is listed once per change
+_lrc_index = {}
+
+def _scan_lrc_names(directory, index):
+    subdirs = []
+    try:
+        with os.scandir(directory) as it:
+            for entry in it:
+                lower = entry.name.lower()
+                if lower.endswith('.lrc'):
+                    index.setdefault(lower[:-4], entry.path)
+                elif lower in _LYRICS_SUBDIRS and entry.is_dir():
+                    subdirs.append(entry.path)
+    except OSError: pass
+    return subdirs
+
+def find_local_lrc(file_path):
+    """Path of the .lrc for an audio file: beside it or in a lyrics/ or .lrc/ subfolder, any case"""
+    directory, name = os.path.split(os.path.abspath(file_path))
+    try: mtime = os.stat(directory).st_mtime_ns
+    except OSError: return None
+    cached = _lrc_index.get(directory)
+    if cached is None or cached[0] != mtime:
+        index = {}
+        # Files beside the tracks win over the lyrics subfolders
+        for sub in _scan_lrc_names(directory, index):
+            _scan_lrc_names(sub, index)
+        cached = _lrc_index[directory] = (mtime, index)
+    return cached[1].get(os.path.splitext(name)[0].lower())
+
+def read_local_lrc(file_path):
+    """Synced lyrics from the track's .lrc sidecar, or None"""
+    path = find_local_lrc(file_path)
+    if not path: return None
+    try:
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            return parse_lrc(f.read()) or None
+    except OSError:
+        return None
+
+def stream_target(item):
+    """Return what mpv should open for a search result: its URL, or a watch URL for a bare YouTube id"""
+    target = item.get('url') or item['id']
+    if len(target) == 11 and '.' not in target:
+        target = f"https://www.youtube.com/watch?v={target}"
+    return target
+
+def queue_keys(queue):
+    """Return (paths, stream ids/urls) in the queue; rows are then checked against these sets in O(1)"""
+    paths, streams = set(), set()
+    for q_item in queue:
+        if q_item['type'] == 'file':
+            paths.add(q_item['path'])
+        else:
+            if q_item.get('id'): streams.add(q_item['id'])
+            if q_item.get('url'): streams.add(q_item['url'])
+    return paths, streams
+
+def in_queue(item, keys, current_dir):
+    """Check a browser or search item against queue_keys(); local paths are relative to current_dir"""
+    paths, streams = keys
+    if item.get('type') == 'file':
+        # Scanned entries carry abs_path; other items are relative to current_dir
+        try: return (item.get('abs_path') or os.path.abspath(os.path.join(current_dir, item['path']))) in paths
+        except: return False
+    return item.get('id') in streams or item.get('url') in streams
+
+# Slug cleanup: separator runs become one dash, everything else non-word is dropped
+_SLUG_SEP_RE = re.compile(r'[\s\-_]+')
+_SLUG_DROP_RE = re.compile(r'[^\w\-]')
 
 def slugify(text):
     """Convert text to letters-mus-br slug format"""
-    text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('utf-8')
+    if not text.isascii():
+        # Only non-ASCII text needs accents stripped; most titles skip the round trip
+        text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('ascii')
     text = text.lower()
-    text = re.sub(r'[\s\-_]+', '-', text)
-    text = re.sub(r'[^\w\-]', '', text)
+    text = _SLUG_SEP_RE.sub('-', text)
+    text = _SLUG_DROP_RE.sub('', text)
     return text.strip('-')
 
 def format_time(seconds):
     if seconds is None: return "00:00"
-    mins = int(seconds // 60)
-    secs = int(seconds % 60)
+    # One int conversion and divmod; called twice per clock tick
+    mins, secs = divmod(int(seconds), 60)
     return f"{mins:02d}:{secs:02d}"
 
+# One timestamped LRC line, e.g. "[01:23.45] text"
+_LRC_RE = re.compile(r'^\[(\d+):(\d+(?:\.\d+)?)\](.*)$', re.MULTILINE)
+
 def parse_lrc(lrc_text):
-    parsed = []
-    pattern = re.compile(r'\[(\d+):(\d+(?:\.\d+)?)\](.*)')
-    for line in lrc_text.splitlines():
-        match = pattern.match(line)
-        if match:
-            minutes = float(match.group(1))
-            seconds = float(match.group(2))
-            text = match.group(3).strip()
-            timestamp = minutes * 60 + seconds
-            parsed.append({'time': timestamp, 'text': text})
-    return parsed
+    return [{'time': int(minutes) * 60 + float(seconds), 'text': text.strip()}
+            for minutes, seconds, text in _LRC_RE.findall(lrc_text)]
+
+def lyric_times(lyrics):
+    """Timestamps of the leading synced lines, for a bisect per redraw instead of a scan"""
+    times = []
+    for line in lyrics or ():
+        if line['time'] is None: break
+        times.append(line['time'])
+    return times
+
+def lyrics_from_lrclib(record):
+    """Turn an LRCLib track record into lyric lines, preferring synced lyrics"""
+    if record.get('syncedLyrics'):
+        return parse_lrc(record['syncedLyrics'])
+    if record.get('plainLyrics'):
+        return [{'time': None, 'text': l} for l in record['plainLyrics'].split('\n')]
+    return None
+
+def pick_lrclib_match(records, artist, title):
+    """Best LRCLib search hit for artist/title: synced first, only same-titled tracks"""
+    want_title = slugify(title)
+    want_artist = slugify(artist)
+    matches = [r for r in records
+               if slugify(r.get('trackName') or '') == want_title
+               and want_artist in slugify(r.get('artistName') or '')]
+    for record in matches:
+        if record.get('syncedLyrics'):
+            return lyrics_from_lrclib(record)
+    for record in matches:
+        lyrics = lyrics_from_lrclib(record)
+        if lyrics: return lyrics
+    return None
+
+# Regex fallback for letras.mus.br pages when lxml is not installed
+_LETRAS_BODY_RE = re.compile(r'<div class="cnt-letra[^"]*"> (.*?)</div>', re.DOTALL)
+_BR_RE = re.compile(r'<br\s*/?>', re.IGNORECASE)
+_TAG_RE = re.compile(r'<[^>]+>')
+
+def parse_letras_html(html):
+    """Extract lyric lines from a letras.mus.br page (bytes or str), or None if not found"""
+    if lxml is not None:
+        try:
+            if isinstance(html, bytes):
+                tree = lxml.html.fromstring(html, parser=_UTF8_HTML_PARSER)
+            else:
+                tree = lxml.html.fromstring(html)
+        except Exception:
+            return None
+        nodes = tree.xpath('//div[contains(@class, "cnt-letra")]')
+        if not nodes:
+            return None
+        # text_content() drops <br> and paragraph breaks, so turn them into newlines first
+        for br in nodes[0].iter('br'):
+            br.tail = '\n' + (br.tail or '')
+        for p in nodes[0].iter('p'):
+            p.tail = '\n\n' + (p.tail or '')
+        text = nodes[0].text_content().strip()
+    else:
+        if isinstance(html, bytes):
+            html = html.decode('utf-8', errors='ignore')
+        match = _LETRAS_BODY_RE.search(html)
+        if not match:
+            return None
+        text = _BR_RE.sub('\n', match.group(1))
+        text = unescape(_TAG_RE.sub('', text))
+    return [{'time': None, 'text': line.strip()} for line in text.split('\n')]
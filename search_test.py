@@ -1,10 +1,13 @@
 import yt_dlp
 import json
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Searches run in parallel; each report is printed in one piece
+_print_lock = threading.Lock()
 
 def test_search(query, source='youtube'):
-    print(f"--- Testing Source: {source} (Query: '{query}') ---")
-    
     # yt-dlp search prefixes
     prefix = "ytsearch5:" if source == 'youtube' else "scsearch5:"
     
@@ -14,35 +17,44 @@ def test_search(query, source='youtube'):
         'extract_flat': 'in_playlist', # Just extract metadata, don't download, don't resolve deep URLs yet
         'skip_download': True,
         'no_warnings': True,
+        # A stalled connection fails the search instead of hanging it for yt-dlp's default 20s
+        'socket_timeout': 10,
     }
     
     try:
         with yt_dlp.YoutubeDL(ydl_opts) as ydl:
             # The search query is formatted as "prefix:query"
             info = ydl.extract_info(f"{prefix}{query}", download=False)
-            
-            if 'entries' in info:
-                results = list(info['entries'])
-                print(f"Found {len(results)} results:")
-                for i, entry in enumerate(results):
-                    title = entry.get('title', 'Unknown')
-                    uploader = entry.get('uploader', 'Unknown')
-                    duration = entry.get('duration', 0)
-                    url = entry.get('url', 'No URL')
-                    video_id = entry.get('id', 'No ID')
-                    
-                    print(f"[{i+1}] {title}")
-                    print(f"    Artist: {uploader}")
-                    print(f"    Duration: {duration}s")
-                    print(f"    ID: {video_id}")
-                    # print(f"    URL: {url}") # URL in extract_flat is usually just the ID or webpage_url
-            else:
-                print("No 'entries' found in result.")
-                
     except Exception as e:
-        print(f"Error searching {source}: {e}")
-    print("\n")
+        info = e
+
+    with _print_lock:
+        print(f"--- Testing Source: {source} (Query: '{query}') ---")
+        if isinstance(info, Exception):
+            print(f"Error searching {source}: {info}")
+        elif 'entries' in info:
+            # Print rows as they come; entries may be a lazy generator
+            count = 0
+            for i, entry in enumerate(info['entries']):
+                count += 1
+                title = entry.get('title', 'Unknown')
+                uploader = entry.get('uploader', 'Unknown')
+                duration = entry.get('duration', 0)
+                url = entry.get('url', 'No URL')
+                video_id = entry.get('id', 'No ID')
+                
+                print(f"[{i+1}] {title}")
+                print(f"    Artist: {uploader}")
+                print(f"    Duration: {duration}s")
+                print(f"    ID: {video_id}")
+                # print(f"    URL: {url}") # URL in extract_flat is usually just the ID or webpage_url
+            print(f"Found {count} results")
+        else:
+            print("No 'entries' found in result.")
+        print("\n")
 
 if __name__ == "__main__":
-    test_search("Coldplay Yellow", "youtube")
-    test_search("Synthwave", "soundcloud")
+    # Independent network round trips: total time is the slower search, not the sum
+    searches = [("Coldplay Yellow", "youtube"), ("Synthwave", "soundcloud")]
+    with ThreadPoolExecutor(max_workers=len(searches)) as pool:
+        list(pool.map(lambda args: test_search(*args), searches))
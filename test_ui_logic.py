@@ -15,7 +15,7 @@ class TestMusicPlayerLogic(unittest.TestCase):
                 with unittest.mock.patch('curses.start_color'):
                      with unittest.mock.patch('curses.use_default_colors'):
                          with unittest.mock.patch('curses.init_pair'):
-                             with unittest.mock.patch('curses.curs_set'):
+                             with unittest.mock.patch('curses.curs_set'), unittest.mock.patch('curses.color_pair'):
                                  self.player = MusicPlayer(self.stdscr)
 
     def test_initial_view_mode(self):
@@ -52,5 +52,63 @@ class TestMusicPlayerLogic(unittest.TestCase):
         search_item_2 = {'type': 'stream', 'id': '67890', 'title': 'Other Song'}
         self.assertFalse(self.player.is_in_queue(search_item_2))
 
+    def test_next_prev_skip_directories(self):
+        self.player.files = [
+            {'name': '..', 'type': 'dir', 'path': '..'},
+            {'name': 'a.mp3', 'type': 'file', 'path': 'a.mp3'},
+            {'name': 'sub', 'type': 'dir', 'path': 'sub'},
+            {'name': 'b.mp3', 'type': 'file', 'path': 'b.mp3'},
+        ]
+        self.player._index_files()
+        self.assertEqual(self.player.get_next_index(1), 3)
+        self.assertIsNone(self.player.get_next_index(3))
+        self.assertEqual(self.player.get_prev_index(3), 1)
+        self.assertIsNone(self.player.get_prev_index(1))
+
+    def test_play_previous_prefers_history_then_listing(self):
+        self.player.files = [
+            {'name': 'a.mp3', 'type': 'file', 'path': 'a.mp3'},
+            {'name': 'sub', 'type': 'dir', 'path': 'sub'},
+            {'name': 'b.mp3', 'type': 'file', 'path': 'b.mp3'},
+            {'name': 'c.mp3', 'type': 'file', 'path': 'c.mp3'},
+        ]
+        self.player._index_files()
+        self.player.play_file = MagicMock()
+        self.player.playing_index = 3
+        self.player.playback_history.append(0)
+        self.assertEqual(self.player.get_prev_index(3), 0)
+        self.player.play_previous()
+        self.player.play_file.assert_called_once_with(0, push_history=False)
+        self.assertFalse(self.player.playback_history)
+
+        # Nothing played before: step back through the files, skipping directories
+        self.player.play_file.reset_mock()
+        self.player.playing_index = 2
+        self.player.play_previous()
+        self.player.play_file.assert_called_once_with(0, push_history=False)
+
+    def test_position_interpolates_while_playing(self):
+        self.player.mpv_process = MagicMock()
+        self.player.duration = 100
+        with unittest.mock.patch('musicplayer.main.time.monotonic', return_value=50.0):
+            self.player.position = 10
+        with unittest.mock.patch('musicplayer.main.time.monotonic', return_value=51.5):
+            self.assertAlmostEqual(self.player.position, 11.5)
+            self.player.paused = True
+            self.assertEqual(self.player.position, 10)
+
+    def test_property_change_events_update_state(self):
+        self.player.handle_end_of_file = MagicMock()
+        self.player.handle_property_change('duration', 200.0)
+        self.player.handle_property_change('metadata', {'media-title': 'Song', 'artist': 'Band'})
+        self.player.handle_property_change('pause', True)
+        self.assertEqual(self.player.duration, 200.0)
+        self.assertEqual(self.player.metadata, {'title': 'Song', 'artist': 'Band'})
+        self.assertTrue(self.player.paused)
+        self.player.handle_end_of_file.assert_not_called()
+
+        self.player.handle_property_change('idle-active', True)
+        self.player.handle_end_of_file.assert_called_once()
+
 if __name__ == '__main__':
     unittest.main()